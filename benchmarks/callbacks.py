@@ -0,0 +1,190 @@
+"""Benchmark data preparation and every callback at several dataset sizes.
+
+Run from the repository root:
+
+    python -m benchmarks.callbacks [--sizes 10 1000 10000 100000] [--output results.json]
+    python -m benchmarks.callbacks --output new.json --compare old.json
+
+Each size builds a synthetic dataset (src.synthetic, fixed seed) and times
+fill_missing_years, the subject-average pipeline (prepare_grades) and each
+callback function called directly, without the figure cache. Every result
+has the median, p95 and minimum latency, the peak memory allocated during
+one call (tracemalloc) and, for callbacks, the size of the JSON response.
+The JSON output is stable across commits; --compare prints the ratio of
+each median latency to a previous run's.
+"""
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import dash
+import numpy as np
+import pandas as pd
+import plotly
+from plotly.io.json import to_json_plotly
+
+from src.callbacks import (
+    update_card,
+    update_dashboard,
+    update_exam_table,
+    update_performance_chart,
+    update_subject_performance_chart,
+    update_summary_table,
+)
+from src.dataset import Dataset, all_years, fill_missing_years, prepare_grades
+from src.synthetic import generate_grades
+
+# Version of the JSON layout written by --output
+FORMAT = 1
+
+
+# What a result depends on besides the code: the commit and library versions
+def environment():
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "plotly": plotly.__version__,
+        "dash": dash.__version__,
+    }
+
+
+# Run ``call(i)`` ``repeat`` times for the latencies, then once more under
+# tracemalloc for the peak memory. Returns the result and the measurements.
+def measure(call, repeat):
+    seconds = []
+    result = None
+    for i in range(repeat):
+        start = time.perf_counter()
+        result = call(i)
+        seconds.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    call(repeat)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    seconds.sort()
+    return result, {
+        "median_ms": round(statistics.median(seconds) * 1e3, 4),
+        "p95_ms": round(seconds[min(len(seconds) - 1, int(len(seconds) * 0.95))] * 1e3, 4),
+        "min_ms": round(seconds[0] * 1e3, 4),
+        "peak_bytes": peak,
+    }
+
+
+def response_bytes(result):
+    return len(to_json_plotly(result))
+
+
+# Students and years the callbacks are called with: spread over the dataset
+# so each call reads a different row, always one the student has
+def selections(dataset, count, seed):
+    rng = np.random.default_rng(seed)
+    students, years = np.nonzero(dataset.row_positions >= 0)
+    picks = rng.integers(0, len(students), size=count)
+    grades = dataset.grades
+    return [(grades.students[students[i]], grades.years[years[i]]) for i in picks]
+
+
+def bench_size(n_students, repeat, prep_repeat, seed):
+    results = []
+    raw = generate_grades(n_students, seed=seed)
+
+    _, stats = measure(lambda i: fill_missing_years(raw, all_years), prep_repeat)
+    results.append({"name": "fill_missing_years", **stats})
+    _, stats = measure(lambda i: prepare_grades(raw), prep_repeat)
+    results.append({"name": "prepare_grades", **stats})
+
+    dataset = Dataset.from_frame(raw, version=f"benchmark-{n_students}-{seed}")
+    picks = selections(dataset, repeat + 1, seed)
+    subjects = list(dataset.grades.subjects)
+    languages = ["en", "es"]
+
+    def args(i):
+        student, year = picks[i]
+        return student, year, subjects[i % len(subjects)], languages[i % len(languages)]
+
+    callbacks = {
+        "update_card": lambda i: update_card(dataset, args(i)[0]),
+        "update_summary_table": lambda i: update_summary_table(dataset, args(i)[0], args(i)[1], args(i)[3]),
+        "update_exam_table": lambda i: update_exam_table(dataset, args(i)[3], args(i)[0], args(i)[1]),
+        "update_performance_chart": lambda i: update_performance_chart(dataset, *args(i)),
+        "update_subject_performance_chart": lambda i: update_subject_performance_chart(
+            dataset, args(i)[0], args(i)[1], args(i)[3]
+        ),
+        "update_dashboard": lambda i: update_dashboard(dataset, args(i)[3], *args(i)[:3]),
+    }
+    for name, call in callbacks.items():
+        result, stats = measure(call, repeat)
+        results.append({"name": name, **stats, "response_bytes": response_bytes(result)})
+
+    for result in results:
+        result.update(students=n_students, rows=len(raw))
+    return results
+
+
+def compare(results, baseline_path):
+    with open(baseline_path) as handle:
+        baseline = json.load(handle)
+    before = {(r["students"], r["name"]): r for r in baseline["results"]}
+    print(f"\ncompared with {baseline_path} ({baseline['environment'].get('commit')})")
+    print(f"{'students':>9} {'name':<34} {'before ms':>10} {'after ms':>10} {'ratio':>7}")
+    for result in results:
+        old = before.get((result["students"], result["name"]))
+        if old is None:
+            continue
+        ratio = result["median_ms"] / old["median_ms"] if old["median_ms"] else float("inf")
+        print(f"{result['students']:>9} {result['name']:<34} {old['median_ms']:>10.3f} {result['median_ms']:>10.3f} {ratio:>6.2f}x")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 1000, 10000, 100000])
+    parser.add_argument("--repeat", type=int, default=20, help="calls per callback")
+    parser.add_argument("--prep-repeat", type=int, default=3, help="calls per data preparation step")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the results as JSON to this path")
+    parser.add_argument("--compare", help="a previous --output file to compare against")
+    args = parser.parse_args(argv)
+
+    results = []
+    print(f"{'students':>9} {'name':<34} {'median ms':>10} {'p95 ms':>10} {'peak KiB':>10} {'bytes':>8}")
+    for n_students in args.sizes:
+        for result in bench_size(n_students, args.repeat, args.prep_repeat, args.seed):
+            results.append(result)
+            print(
+                f"{n_students:>9} {result['name']:<34} {result['median_ms']:>10.3f} {result['p95_ms']:>10.3f}"
+                f" {result['peak_bytes'] / 1024:>10.1f} {result.get('response_bytes', ''):>8}"
+            )
+            sys.stdout.flush()
+
+    report = {
+        "format": FORMAT,
+        "environment": environment(),
+        "parameters": {"sizes": args.sizes, "repeat": args.repeat, "prep_repeat": args.prep_repeat, "seed": args.seed},
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as handle:
+            json.dump(report, handle, indent=2)
+            handle.write("\n")
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
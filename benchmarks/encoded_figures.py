@@ -0,0 +1,91 @@
+"""Compare per-request CPU for cached figures with and without pre-encoding.
+
+Run from the repository root:
+
+    python -m benchmarks.encoded_figures [--requests 500]
+
+Both apps keep every figure in the figure cache; one stores go.Figure
+objects that Dash re-serializes on each response, the other stores the
+encoded JSON bytes and splices them into the response.
+"""
+import argparse
+import itertools
+import time
+
+from src.app import create_app
+from src.config import Config
+from src.data_source import CsvDataSource
+from src.dataset import all_years, subjects
+
+
+# An output of the consolidated callback, which identifies it among the
+# server and clientside callbacks
+DASHBOARD_OUTPUT = "average-value.children"
+
+
+# The consolidated callback's request body, as the browser sends it
+def update_request(app, language, student, year, subject):
+    output, callback = next(
+        (output, callback)
+        for output, callback in app.callback_map.items()
+        if DASHBOARD_OUTPUT in output.strip(".").split("...")
+    )
+    values = {
+        "language-dropdown": language,
+        "student-dropdown": student,
+        "year-dropdown": year,
+        "subject-dropdown": subject,
+    }
+    return {
+        "output": output,
+        "outputs": [
+            dict(zip(("id", "property"), spec.split(".")))
+            for spec in output.strip(".").split("...")
+        ],
+        "inputs": [
+            {"id": spec["id"], "property": spec["property"], "value": values[spec["id"]]}
+            for spec in callback["inputs"]
+        ],
+        "changedPropIds": [],
+        "state": [],
+    }
+
+
+def run(encoded, requests):
+    config = Config(secret_key="benchmark", encoded_figures=encoded)
+    app = create_app(config, CsvDataSource(snapshot_dir=None))
+    client = app.server.test_client()
+    combinations = list(itertools.product(["en", "es"], ["John Doe", "Jane Doe"], all_years[:4], subjects[:3]))
+    bodies = [update_request(app, *combination) for combination in combinations]
+
+    # Warm the figure cache so every measured request is a hit
+    for body in bodies:
+        response = client.post("/_dash-update-component", json=body)
+        if response.status_code != 200:
+            raise RuntimeError(f"callback request failed with {response.status_code}")
+
+    cpu = time.process_time()
+    wall = time.perf_counter()
+    for body in itertools.islice(itertools.cycle(bodies), requests):
+        client.post("/_dash-update-component", json=body)
+    cpu = time.process_time() - cpu
+    wall = time.perf_counter() - wall
+    return cpu / requests, wall / requests
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=500)
+    args = parser.parse_args(argv)
+
+    print(f"{'figures':>10} {'cpu ms/req':>12} {'wall ms/req':>12}")
+    results = {}
+    for encoded in (False, True):
+        cpu, wall = run(encoded, args.requests)
+        results[encoded] = cpu
+        print(f"{'encoded' if encoded else 'objects':>10} {cpu * 1e3:>12.3f} {wall * 1e3:>12.3f}")
+    print(f"CPU per request with encoded figures: {results[True] / results[False]:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""Benchmark fill_missing_years at increasing numbers of students.
+
+Run from the repository root:
+
+    python -m benchmarks.fill_missing_years [--sizes 1000 10000 100000]
+
+Prints the time per call and per student; with the reindex implementation
+the per-student time should stay roughly flat as the dataset grows.
+"""
+import argparse
+import time
+
+from src.dataset import all_years, fill_missing_years
+from src.synthetic import generate_grades
+
+
+# Build a frame in the CSV's schema where each student is missing about
+# a quarter of their years
+def make_frame(n_students, missing_fraction=0.25, seed=0):
+    return generate_grades(n_students, missing_fraction, seed)
+
+
+def time_call(df, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fill_missing_years(df, all_years)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    print(f"{'students':>10} {'rows':>10} {'seconds':>10} {'us/student':>12}")
+    per_student = []
+    for n_students in args.sizes:
+        df = make_frame(n_students)
+        seconds = time_call(df, args.repeat)
+        per_student.append(seconds / n_students)
+        print(f"{n_students:>10} {len(df):>10} {seconds:>10.4f} {per_student[-1] * 1e6:>12.2f}")
+
+    print(f"per-student cost, largest vs smallest size: {per_student[-1] / per_student[0]:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
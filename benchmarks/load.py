@@ -0,0 +1,381 @@
+"""Load-test the dashboard with concurrent simulated users.
+
+Run from the repository root:
+
+    python -m benchmarks.load [--configs 1x1 2x4 4x8] [--users 16] [--duration 30]
+    python -m benchmarks.load --server flask --users 4
+    python -m benchmarks.load --url http://127.0.0.1:8000 --users 8
+
+For each workers x threads configuration the app is started under gunicorn
+(the Procfile's command, on a free local port) or, with --server flask, on
+Werkzeug's threaded development server in this process. With --url an
+already running app is driven instead. The app reads its settings from the
+environment as in production (DATA_PATH, SHARED_CACHE, WARMUP, ...); the
+secret key and the basic auth credentials default to throwaway values.
+
+Each simulated user opens the page (layout, dependencies and the initial
+callbacks), then changes a dropdown --actions times (the student most
+often, the language least) and starts over, sending the same
+_dash-update-component requests as the browser: every server callback with
+the changed dropdown among its inputs. The report gives the throughput and
+the p50/p95/p99 latency of each callback; --output saves it as JSON.
+"""
+import argparse
+import base64
+import json
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from collections import defaultdict
+
+import requests
+
+UPDATE_PATH = "/_dash-update-component"
+
+# How often each dropdown is changed, relative to the others
+ACTIONS = {
+    "student-dropdown": 0.4,
+    "year-dropdown": 0.3,
+    "subject-dropdown": 0.2,
+    "language-dropdown": 0.1,
+}
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def app_environment(args):
+    env = dict(os.environ)
+    env.setdefault("SECRET_KEY", "load-test")
+    env["AUTH_USERNAME"] = args.username
+    env["AUTH_PASSWORD"] = args.password
+    return env
+
+
+def wait_ready(url, timeout, process=None):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process is not None and process.poll() is not None:
+            raise RuntimeError(f"the server exited with status {process.returncode}")
+        try:
+            if requests.get(url + "/ready", timeout=1).status_code == 200:
+                return
+        except requests.ConnectionError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"{url} was not ready after {timeout} seconds")
+
+
+class GunicornServer:
+    """The Procfile's gunicorn command on a free local port."""
+
+    def __init__(self, workers, threads, env, timeout):
+        self.label = f"gunicorn {workers}x{threads}"
+        self.url = f"http://127.0.0.1:{free_port()}"
+        self.command = [
+            sys.executable, "-m", "gunicorn", "--preload",
+            "--workers", str(workers), "--threads", str(threads),
+            "--bind", self.url[len("http://"):], "--log-level", "warning",
+            "src.app:create_server()",
+        ]
+        self.env = env
+        self.timeout = timeout
+        self.process = None
+
+    def __enter__(self):
+        self.process = subprocess.Popen(self.command, env=self.env)
+        try:
+            wait_ready(self.url, self.timeout, self.process)
+        except BaseException:
+            self.__exit__()
+            raise
+        return self
+
+    def __exit__(self, *exc):
+        self.process.terminate()
+        try:
+            self.process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+            self.process.wait()
+
+
+class FlaskServer:
+    """The app on Werkzeug's threaded server, in a thread of this process.
+
+    The simulated users share this process's GIL with the app, so the
+    numbers are a lower bound; use gunicorn to size a deployment.
+    """
+
+    label = "flask threaded"
+
+    def __init__(self, env, timeout):
+        self.env = env
+        self.timeout = timeout
+
+    def __enter__(self):
+        from werkzeug.serving import WSGIRequestHandler, make_server
+
+        from src.app import create_server
+
+        class QuietHandler(WSGIRequestHandler):
+            def log_request(self, *args, **kwargs):
+                pass
+
+        os.environ.update(self.env)
+        self.server = make_server("127.0.0.1", 0, create_server(), threaded=True, request_handler=QuietHandler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        wait_ready(self.url, self.timeout)
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.thread.join()
+
+
+class RunningServer:
+    label = "external"
+
+    def __init__(self, url):
+        self.url = url.rstrip("/")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+
+# Every component's props in the layout, by id
+def component_props(node, props=None):
+    props = {} if props is None else props
+    if isinstance(node, list):
+        for child in node:
+            component_props(child, props)
+    elif isinstance(node, dict):
+        if "props" in node and "type" in node:
+            if isinstance(node["props"].get("id"), str):
+                props[node["props"]["id"]] = node["props"]
+            for value in node["props"].values():
+                component_props(value, props)
+    return props
+
+
+def output_specs(output):
+    if output.startswith(".."):
+        return [dict(zip(("id", "property"), spec.split("."))) for spec in output.strip(".").split("...")]
+    return dict(zip(("id", "property"), output.split(".")))
+
+
+# Short name of a callback for the report: its first output
+def callback_label(dependency):
+    specs = output_specs(dependency["output"])
+    if isinstance(specs, dict):
+        return f"{specs['id']}.{specs['property']}"
+    extra = f" (+{len(specs) - 1})" if len(specs) > 1 else ""
+    return f"{specs[0]['id']}.{specs[0]['property']}{extra}"
+
+
+def update_body(dependency, props, changed):
+    def values(specs):
+        return [
+            {"id": spec["id"], "property": spec["property"], "value": props.get(spec["id"], {}).get(spec["property"])}
+            for spec in specs
+        ]
+
+    return {
+        "output": dependency["output"],
+        "outputs": output_specs(dependency["output"]),
+        "inputs": values(dependency["inputs"]),
+        "state": values(dependency["state"]),
+        "changedPropIds": [changed] if changed else [],
+    }
+
+
+class User:
+    """One simulated browser, recording (callback, seconds, ok) samples."""
+
+    def __init__(self, url, auth, actions, think, rng):
+        self.url = url
+        self.actions = actions
+        self.think = think
+        self.rng = rng
+        self.session = requests.Session()
+        self.session.headers["Authorization"] = auth
+        self.samples = []
+
+    def request(self, label, method, path, **kwargs):
+        start = time.perf_counter()
+        try:
+            response = self.session.request(method, self.url + path, timeout=60, **kwargs)
+            ok = response.status_code in (200, 204)
+        except requests.RequestException:
+            response, ok = None, False
+        self.samples.append((label, time.perf_counter() - start, ok))
+        return response if ok else None
+
+    def call(self, dependency, props, changed):
+        body = update_body(dependency, props, changed)
+        self.request(callback_label(dependency), "POST", UPDATE_PATH, json=body)
+
+    def page_view(self, deadline):
+        layout = self.request("layout", "GET", "/_dash-layout")
+        dependencies = self.request("dependencies", "GET", "/_dash-dependencies")
+        if layout is None or dependencies is None:
+            return
+        props = component_props(layout.json())
+        dependencies = [dep for dep in dependencies.json() if not dep.get("clientside_function")]
+        for dependency in dependencies:
+            if not dependency.get("prevent_initial_call"):
+                self.call(dependency, props, None)
+
+        choices = {
+            component: [option["value"] for option in props[component].get("options") or []]
+            for component in ACTIONS
+            if component in props
+        }
+        components = [component for component in ACTIONS if choices.get(component)]
+        weights = [ACTIONS[component] for component in components]
+        for _ in range(self.actions):
+            if time.monotonic() >= deadline:
+                return
+            if self.think:
+                time.sleep(self.rng.expovariate(1 / self.think))
+            component = self.rng.choices(components, weights)[0]
+            props[component]["value"] = self.rng.choice(choices[component])
+            changed = f"{component}.value"
+            for dependency in dependencies:
+                if any(f"{spec['id']}.{spec['property']}" == changed for spec in dependency["inputs"]):
+                    self.call(dependency, props, changed)
+
+    def run(self, deadline):
+        while time.monotonic() < deadline:
+            self.page_view(deadline)
+
+
+def percentile(values, q):
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+
+def drive(url, args, seed):
+    auth = "Basic " + base64.b64encode(f"{args.username}:{args.password}".encode()).decode()
+    ramp_end = time.monotonic() + args.ramp
+    deadline = ramp_end + args.duration
+    users = [User(url, auth, args.actions, args.think, random.Random(seed + i)) for i in range(args.users)]
+
+    # Samples from the ramp-up are dropped
+    def run(user):
+        user.run(ramp_end)
+        user.samples.clear()
+        user.run(deadline)
+
+    threads = [threading.Thread(target=run, args=(user,)) for user in users]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - ramp_end
+
+    by_label = defaultdict(list)
+    errors = defaultdict(int)
+    for user in users:
+        for label, seconds, ok in user.samples:
+            by_label[label].append(seconds)
+            errors[label] += not ok
+    callbacks = {}
+    for label, seconds in sorted(by_label.items()):
+        seconds.sort()
+        callbacks[label] = {
+            "requests": len(seconds),
+            "errors": errors[label],
+            "per_second": round(len(seconds) / elapsed, 2),
+            "p50_ms": round(statistics.median(seconds) * 1e3, 2),
+            "p95_ms": round(percentile(seconds, 0.95) * 1e3, 2),
+            "p99_ms": round(percentile(seconds, 0.99) * 1e3, 2),
+        }
+    updates = sum(stats["requests"] for label, stats in callbacks.items() if label not in ("layout", "dependencies"))
+    return {
+        "seconds": round(elapsed, 2),
+        "requests": sum(stats["requests"] for stats in callbacks.values()),
+        "errors": sum(errors.values()),
+        "updates_per_second": round(updates / elapsed, 2),
+        "callbacks": callbacks,
+    }
+
+
+def print_report(label, report):
+    print(
+        f"\n{label}: {report['requests']} requests in {report['seconds']} s, "
+        f"{report['updates_per_second']} callback requests/s, {report['errors']} errors"
+    )
+    print(f"{'callback':<44} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>7}")
+    for name, stats in report["callbacks"].items():
+        print(
+            f"{name[:44]:<44} {stats['per_second']:>8.2f} {stats['p50_ms']:>9.2f}"
+            f" {stats['p95_ms']:>9.2f} {stats['p99_ms']:>9.2f} {stats['errors']:>7}"
+        )
+    sys.stdout.flush()
+
+
+def parse_config(value):
+    try:
+        workers, threads = (int(part) for part in value.lower().split("x"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected WORKERSxTHREADS, e.g. 2x4, not {value!r}")
+    return workers, threads
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--server", choices=("gunicorn", "flask"), default="gunicorn")
+    parser.add_argument("--configs", type=parse_config, nargs="+", default=[(1, 1), (2, 4), (4, 8)],
+                        help="gunicorn workers x threads to run in turn")
+    parser.add_argument("--url", help="drive an app that is already running instead of starting one")
+    parser.add_argument("--users", type=int, default=16, help="concurrent simulated users")
+    parser.add_argument("--duration", type=float, default=30, help="measured seconds per configuration")
+    parser.add_argument("--ramp", type=float, default=5, help="unmeasured seconds before that")
+    parser.add_argument("--actions", type=int, default=10, help="dropdown changes per page view")
+    parser.add_argument("--think", type=float, default=0, help="mean seconds between a user's actions")
+    parser.add_argument("--username", default=os.getenv("AUTH_USERNAME") or "load")
+    parser.add_argument("--password", default=os.getenv("AUTH_PASSWORD") or "load")
+    parser.add_argument("--start-timeout", type=float, default=300, help="seconds to wait for /ready")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the reports as JSON to this path")
+    args = parser.parse_args(argv)
+
+    env = app_environment(args)
+    if args.url:
+        servers = [RunningServer(args.url)]
+    elif args.server == "flask":
+        servers = [FlaskServer(env, args.start_timeout)]
+    else:
+        servers = [GunicornServer(workers, threads, env, args.start_timeout) for workers, threads in args.configs]
+
+    reports = []
+    for server in servers:
+        with server:
+            report = drive(server.url, args, args.seed)
+        print_report(server.label, report)
+        reports.append({"server": server.label, **report})
+
+    if args.output:
+        parameters = {
+            name: getattr(args, name) for name in ("users", "duration", "ramp", "actions", "think", "seed")
+        }
+        with open(args.output, "w") as handle:
+            json.dump({"parameters": parameters, "reports": reports}, handle, indent=2)
+            handle.write("\n")
+
+
+if __name__ == "__main__":
+    main()
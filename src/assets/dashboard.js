@@ -0,0 +1,172 @@
+// Clientside callbacks. apply_language switches the labels, column headers
+// and year options from the precompiled "i18n-catalog" store. In the
+// client-side data mode (CLIENT_SIDE_DATA) the server sends one student's
+// grades to the "student-store" dcc.Store and the other functions rebuild
+// the tables and figures from it, matching what src/callbacks.py builds on
+// the server.
+(function () {
+    var noUpdate = function () {
+        return window.dash_clientside.no_update;
+    };
+
+    function yearIndex(store, year) {
+        return store ? store.years.indexOf(year) : -1;
+    }
+
+    function translatedYear(catalog, year, language) {
+        return catalog[language].strings.grades[year];
+    }
+
+    // Labels, table columns and year options in the selected language
+    function applyLanguage(language, subject, catalog) {
+        var compiled = catalog && catalog[language];
+        if (!compiled) {
+            return Array(8).fill(noUpdate());
+        }
+        return [
+            compiled.year_options,
+            compiled.labels["student-label"],
+            compiled.labels["dashboard-title"],
+            compiled.labels["grade-label"],
+            compiled.labels["subject-label"],
+            compiled.labels["average-label"],
+            compiled.summary_columns,
+            compiled.exam_columns[subject]
+        ];
+    }
+
+    // Summary table row, with the year translated
+    function summaryRecords(store, year, language, catalog) {
+        var y = yearIndex(store, year);
+        if (y < 0) {
+            return noUpdate();
+        }
+        var record = {
+            "Name": store.student,
+            "Image URL": store.image,
+            "Year": translatedYear(catalog, year, language)
+        };
+        store.subjects.forEach(function (subject, j) {
+            record[subject] = store.averages[y][j];
+        });
+        record["Grade Average"] = store.grade_averages[y];
+        return [record];
+    }
+
+    // Exam table row, with the year translated
+    function examRecords(store, year, language, catalog) {
+        var y = yearIndex(store, year);
+        if (y < 0) {
+            return noUpdate();
+        }
+        var record = {
+            "Name": store.student,
+            "Year": translatedYear(catalog, year, language)
+        };
+        store.subjects.forEach(function (subject, j) {
+            store.exams[y][j].forEach(function (grade, n) {
+                record[subject + " Exam " + (n + 1)] = grade;
+            });
+        });
+        return [record];
+    }
+
+    function thresholdLine(y, color) {
+        return {
+            type: "line",
+            x0: 0, x1: 1, y0: y, y1: y,
+            line: {color: color, width: 1, dash: "dash"},
+            xref: "paper", yref: "y"
+        };
+    }
+
+    // Line chart of the three exams of the selected subject
+    function performanceFigure(store, year, subject, language, template, catalog) {
+        var y = yearIndex(store, year);
+        var j = y < 0 ? -1 : store.subjects.indexOf(subject);
+        if (j < 0) {
+            return noUpdate();
+        }
+        var t = catalog[language].strings;
+        return {
+            data: [{
+                type: "scatter",
+                mode: "lines+markers",
+                x: [t.exam1, t.exam2, t.exam3],
+                y: store.exams[y][j],
+                hovertemplate: "Lapso=%{x}<br>Nota=%{y}<extra></extra>",
+                line: {color: "black", dash: "solid", shape: "spline", width: 4},
+                marker: {symbol: "x", color: "red", size: 10},
+                name: "",
+                legendgroup: "",
+                orientation: "v",
+                showlegend: false
+            }],
+            layout: {
+                template: template,
+                title: {
+                    text: t.performance_over_time + " " + t.of + " " + store.student + " " +
+                        t["in"] + " " + subject + " (" + translatedYear(catalog, year, language) + ")"
+                },
+                xaxis: {anchor: "y", domain: [0, 1], title: {text: "Lapso"}},
+                yaxis: {anchor: "x", domain: [0, 1], title: {text: "Nota"}},
+                legend: {tracegroupgap: 0},
+                shapes: [
+                    thresholdLine(10, "Red"),
+                    thresholdLine(15, "blue"),
+                    thresholdLine(18, "green")
+                ]
+            }
+        };
+    }
+
+    // Bar chart of the subject averages in the selected year
+    function subjectFigure(store, year, language, template, catalog) {
+        var y = yearIndex(store, year);
+        if (y < 0) {
+            return noUpdate();
+        }
+        var t = catalog[language].strings;
+        var colorway = (template && template.layout && template.layout.colorway) || [];
+        return {
+            data: store.subjects.map(function (subject, j) {
+                return {
+                    type: "bar",
+                    x: [subject],
+                    y: [store.averages[y][j]],
+                    name: subject,
+                    legendgroup: subject,
+                    marker: {color: colorway[j % colorway.length], pattern: {shape: ""}},
+                    hovertemplate: "Subject=%{x}<br>Grade=%{y}<extra></extra>",
+                    orientation: "v",
+                    showlegend: true,
+                    textposition: "auto"
+                };
+            }),
+            layout: {
+                template: template,
+                title: {
+                    text: t.subject_performance_comparison + " " + t.of + " " + store.student + " " +
+                        t["in"] + " " + translatedYear(catalog, year, language) + " " + t.grade
+                },
+                xaxis: {
+                    anchor: "y", domain: [0, 1], title: {text: "Subject"},
+                    categoryorder: "array", categoryarray: store.subjects
+                },
+                yaxis: {anchor: "x", domain: [0, 1], title: {text: "Grade"}},
+                legend: {title: {text: "Subject"}, tracegroupgap: 0},
+                barmode: "relative"
+            }
+        };
+    }
+
+    window.dash_clientside = Object.assign({}, window.dash_clientside, {
+        dashboard: {
+            apply_language: applyLanguage,
+            summary_records: summaryRecords,
+            exam_records: examRecords,
+            performance_figure: performanceFigure,
+            subject_figure: subjectFigure
+        }
+    });
+})();
@@ -0,0 +1,57 @@
+// Conditional callback requests. The server tags each callback response
+// with an ETag derived from the request and the dataset version (see
+// src/etags.py). This keeps the most recent responses and sends their ETag
+// with an identical request, so that the server can answer 304 Not
+// Modified without running the callback and the kept response is reused.
+(function () {
+    var MAX_ENTRIES = 200;
+    var kept = new Map();
+    var originalFetch = window.fetch.bind(window);
+
+    function isCallbackRequest(resource, init) {
+        var url = typeof resource === "string" ? resource : resource && resource.url;
+        return Boolean(
+            url && url.indexOf("_dash-update-component") !== -1 &&
+            init && init.method === "POST" && typeof init.body === "string"
+        );
+    }
+
+    function keep(key, entry) {
+        kept.delete(key);
+        kept.set(key, entry);
+        if (kept.size > MAX_ENTRIES) {
+            // Maps iterate in insertion order: the first key is the least recently used
+            kept.delete(kept.keys().next().value);
+        }
+    }
+
+    window.fetch = function (resource, init) {
+        if (!isCallbackRequest(resource, init)) {
+            return originalFetch(resource, init);
+        }
+        var key = init.body;
+        var entry = kept.get(key);
+        var headers = new Headers(init.headers || {});
+        if (entry) {
+            headers.set("If-None-Match", entry.etag);
+        }
+        return originalFetch(resource, Object.assign({}, init, {headers: headers})).then(function (response) {
+            if (response.status === 304 && entry) {
+                keep(key, entry);
+                return new Response(entry.body, {status: 200, headers: {"Content-Type": entry.contentType}});
+            }
+            var etag = response.headers.get("ETag");
+            if (response.status !== 200 || !etag) {
+                return response;
+            }
+            return response.clone().text().then(function (body) {
+                keep(key, {
+                    etag: etag,
+                    body: body,
+                    contentType: response.headers.get("Content-Type") || "application/json"
+                });
+                return response;
+            });
+        });
+    };
+})();
@@ -0,0 +1,564 @@
+from functools import cached_property, wraps
+
+import pandas as pd
+from dash import ClientsideFunction, Input, Output, Patch, State, ctx, no_update
+import plotly.express as px
+
+from src.dataset import subjects
+from src.encoded_json import resolve
+from src.images import image_src, image_srcset
+from src.metrics import time_callback, timed_phase
+from src.translations import translations, get_columns, get_exam_columns
+
+# Callbacks take the prepared dataset as their first argument so they can be
+# called directly; register_callbacks binds them to an app and its dataset.
+
+
+class Selection:
+    """The dropdown values of one request, resolved against the dataset.
+
+    Each lookup (translation, tensor codes, row position) runs at most once
+    however many outputs need it. ``changed`` holds the fields whose dropdown
+    triggered the request, or None when every output has to be built.
+    """
+
+    def __init__(self, dataset, language, student=None, year=None, subject=None, figure_cache=None, changed=None):
+        self.dataset = dataset
+        self.language = language
+        self.student = student
+        self.year = year
+        self.subject = subject
+        self.figure_cache = figure_cache
+        self.changed = changed
+
+    # Build a figure through the figure cache, if there is one
+    def cached_figure(self, key, build):
+        if self.figure_cache is None:
+            return build(self)
+        return self.figure_cache.get_or_build(
+            self.dataset.version, (build.__name__,) + key, lambda: build(self)
+        )
+
+    # A figure already drawn for this student and year can be patched
+    @property
+    def patchable(self):
+        return bool(self.changed) and not self.changed & {"student", "year"}
+
+    @cached_property
+    def translation(self):
+        return translations[self.language]
+
+    @cached_property
+    def translated_year(self):
+        return self.translation['grades'][self.year]
+
+    @cached_property
+    @timed_phase("lookup")
+    def student_code(self):
+        return self.dataset.grades.student_code(self.student)
+
+    @cached_property
+    @timed_phase("lookup")
+    def year_code(self):
+        return self.dataset.grades.year_code(self.year)
+
+    @cached_property
+    @timed_phase("lookup")
+    def position(self):
+        position = self.dataset.row_positions[self.student_code, self.year_code]
+        if position < 0:
+            raise KeyError((self.student, self.year))
+        return position
+
+
+# The student's overall average for the card; its label is translated in the browser
+@timed_phase("lookup")
+def average_card(selection):
+    average_grade = selection.dataset.grades.student_average(selection.student)
+    return str(int(average_grade))
+
+
+def student_image_url(selection):
+    positions = selection.dataset.row_positions[selection.student_code]
+    return selection.dataset.summary_df["Image URL"].iloc[positions[positions >= 0][0]]
+
+
+# The card's photo: the resized copy from the image store, or the
+# placeholder when the photo could not be read
+@timed_phase("lookup")
+def student_image(selection):
+    return image_src(student_image_url(selection))
+
+
+@timed_phase("lookup")
+def student_image_srcset(selection):
+    return image_srcset(student_image_url(selection), "jpg")
+
+
+@timed_phase("lookup")
+def student_image_webp_srcset(selection):
+    return image_srcset(student_image_url(selection), "webp")
+
+
+# Summary table row, with the year translated
+@timed_phase("dataframe")
+def summary_records(selection):
+    filtered_summary_df = selection.dataset.summary_df.iloc[[selection.position]].copy()
+    filtered_summary_df["Year"] = selection.translated_year
+    return filtered_summary_df.to_dict("records")
+
+
+# Exam table row, with the year translated
+@timed_phase("dataframe")
+def exam_records(selection):
+    exam_df = selection.dataset.df.iloc[[selection.position]].copy()
+    exam_df["Year"] = selection.translated_year
+    return exam_df.to_dict("records")
+
+
+def exam_labels(selection):
+    translation = selection.translation
+    return [translation['exam1'], translation['exam2'], translation['exam3']]
+
+
+def exam_grades(selection):
+    grades = selection.dataset.grades
+    return grades.grades[selection.student_code, selection.year_code, grades.subject_code(selection.subject)]
+
+
+def performance_title(selection):
+    translation = selection.translation
+    return f"{translation['performance_over_time']} {translation['of']} {selection.student} {translation['in']} {selection.subject} ({selection.translated_year})"
+
+
+def subject_title(selection):
+    translation = selection.translation
+    return f"{translation['subject_performance_comparison']} {translation['of']} {selection.student} {translation['in']} {selection.translated_year} {translation['grade']}"
+
+
+# Line chart of the three exams of the selected subject
+@timed_phase("figure")
+def build_performance_figure(selection):
+    chart_data = pd.DataFrame({"Lapso": exam_labels(selection), "Nota": exam_grades(selection)})
+
+    fig = px.line(
+        chart_data,
+        x="Lapso",
+        y="Nota",
+        title=performance_title(selection),
+        markers=True,
+        line_shape='spline',  # Smooth the lines
+    )
+
+    # Customize line color and style
+    fig.update_traces(line=dict(color='black', width=4), marker=dict(symbol='x', size=10, color='red'))
+
+    fig.add_shape(
+        type="line",
+        x0=0, x1=1, y0=10, y1=10,
+        line=dict(color="Red", width=1, dash="dash"),
+        xref="paper", yref="y"
+    )
+
+    fig.add_shape(
+        type="line",
+        x0=0, x1=1, y0=15, y1=15,
+        line=dict(color="blue", width=1, dash="dash"),
+        xref="paper", yref="y"
+    )
+
+    fig.add_shape(
+        type="line",
+        x0=0, x1=1, y0=18, y1=18,
+        line=dict(color="green", width=1, dash="dash"),
+        xref="paper", yref="y"
+    )
+    return fig
+
+
+# Bar chart of the subject averages in the selected year
+@timed_phase("figure")
+def build_subject_figure(selection):
+    chart_data = pd.DataFrame({
+        "Subject": subjects,
+        "Grade": selection.dataset.grades.subject_averages[selection.student_code, selection.year_code],
+    })
+
+    fig = px.bar(
+        chart_data,
+        x="Subject",
+        y="Grade",
+        title=subject_title(selection),
+        color="Subject",
+    )
+
+    return fig
+
+
+# When only the language and/or subject changed, the figure already in the
+# browser is patched instead of resent: the title, plus the exam labels for
+# a new language and the grades for a new subject
+@timed_phase("figure")
+def performance_patch(selection):
+    patch = Patch()
+    patch["layout"]["title"]["text"] = performance_title(selection)
+    if "language" in selection.changed:
+        patch["data"][0]["x"] = exam_labels(selection)
+    if "subject" in selection.changed:
+        patch["data"][0]["y"] = exam_grades(selection)
+    return patch
+
+
+# Only the title of the bar chart is translated
+@timed_phase("figure")
+def subject_patch(selection):
+    patch = Patch()
+    patch["layout"]["title"]["text"] = subject_title(selection)
+    return patch
+
+
+def performance_figure(selection):
+    if selection.patchable:
+        return performance_patch(selection)
+    key = (selection.student, selection.year, selection.subject, selection.language)
+    return selection.cached_figure(key, build_performance_figure)
+
+
+def subject_figure(selection):
+    if selection.patchable:
+        return subject_patch(selection)
+    key = (selection.student, selection.year, None, selection.language)
+    return selection.cached_figure(key, build_subject_figure)
+
+
+# Callback to update the average grade card
+def update_card(dataset, selected_student):
+    selection = Selection(dataset, None, selected_student)
+    return (
+        average_card(selection),
+        student_image(selection),
+        student_image_srcset(selection),
+        student_image_webp_srcset(selection),
+    )
+
+def update_summary_table(dataset, selected_student, selected_year, language):
+    return summary_records(Selection(dataset, language, selected_student, selected_year))
+
+# Callback to update the exam table
+def update_exam_table(dataset, language, selected_student, selected_year):
+    return exam_records(Selection(dataset, language, selected_student, selected_year))
+
+# Callback to update the performance over time line chart
+def update_performance_chart(dataset, selected_student, selected_year, selected_subject, language, figure_cache=None, changed=None):
+    return performance_figure(Selection(dataset, language, selected_student, selected_year, selected_subject, figure_cache, changed))
+
+# Callback to update the subject performance bar chart
+def update_subject_performance_chart(dataset, selected_student, selected_year, language, figure_cache=None, changed=None):
+    return subject_figure(Selection(dataset, language, selected_student, selected_year, figure_cache=figure_cache, changed=changed))
+
+
+# Callback to page, sort and filter the summary table on the server
+@timed_phase("dataframe")
+def update_summary_page(dataset, page_current, page_size, sort_by, filter_query, language):
+    columns = [column["id"] for column in get_columns(language)]
+    year_labels = translations[language]['grades']
+    return dataset.summary_query.page(columns, page_current, page_size, sort_by, filter_query, year_labels)
+
+# Callback to page, sort and filter the exam table on the server
+@timed_phase("dataframe")
+def update_exam_page(dataset, page_current, page_size, sort_by, filter_query, language, selected_subject):
+    columns = [column["id"] for column in get_exam_columns(language, selected_subject)]
+    year_labels = translations[language]['grades']
+    return dataset.exam_query.page(columns, page_current, page_size, sort_by, filter_query, year_labels)
+
+
+# Callback to search the student dropdown on the server (paged mode)
+@timed_phase("dataframe")
+def update_student_options(dataset, search_value, selected_student, limit=50):
+    students = dataset.grades.students
+    if search_value:
+        matches = students[students.str.contains(search_value, case=False, regex=False)][:limit]
+    else:
+        matches = students[:limit]
+    names = list(matches)
+    if selected_student is not None and selected_student not in names:
+        names.insert(0, selected_student)
+    return [{"label": name, "value": name} for name in names]
+
+
+# Everything the browser needs to draw one student's tables and charts: the
+# student's slice of the grade tensor and its averages (the translations are
+# already there in i18n-catalog). Missing years are null.
+@timed_phase("dataframe")
+def student_payload(selection):
+    grades = selection.dataset.grades
+
+    def to_list(values):
+        values = values.astype(object)
+        values[pd.isna(values)] = None
+        return values.tolist()
+
+    return {
+        "student": selection.student,
+        "image": student_image_url(selection),
+        "years": list(grades.years),
+        "subjects": list(grades.subjects),
+        "exams": to_list(grades.grades[selection.student_code]),
+        "averages": to_list(grades.subject_averages[selection.student_code]),
+        "grade_averages": to_list(grades.grade_averages[selection.student_code]),
+    }
+
+
+# Callback to send the selected student's data to the browser
+def update_student_store(dataset, selected_student):
+    return student_payload(Selection(dataset, None, selected_student))
+
+
+# Outputs of the consolidated callback, in order, with the builder that
+# fills each one and the dropdowns it depends on
+DASHBOARD_OUTPUTS = [
+    (Output("average-value", "children"), average_card, {"student"}),
+    (Output("student-image", "src"), student_image, {"student"}),
+    (Output("student-image", "srcSet"), student_image_srcset, {"student"}),
+    (Output("student-image-webp", "srcSet"), student_image_webp_srcset, {"student"}),
+    (Output("summary-table", "data"), summary_records, {"language", "student", "year"}),
+    (Output("exam-table", "data"), exam_records, {"language", "student", "year"}),
+    (Output("performance-over-time", "figure"), performance_figure, {"language", "student", "year", "subject"}),
+    (Output("subject-performance-chart", "figure"), subject_figure, {"language", "student", "year"}),
+]
+
+# Dropdown component id for each Selection field
+DASHBOARD_INPUTS = {
+    "language": "language-dropdown",
+    "student": "student-dropdown",
+    "year": "year-dropdown",
+    "subject": "subject-dropdown",
+}
+
+# Outputs filled by update_summary_page / update_exam_page in paged mode
+PAGED_OUTPUTS = {"summary-table.data", "exam-table.data"}
+
+# Outputs rebuilt in the browser from student-store in client-side data mode
+CLIENT_OUTPUTS = {
+    "summary-table.data",
+    "exam-table.data",
+    "performance-over-time.figure",
+    "subject-performance-chart.figure",
+}
+
+
+def dashboard_outputs(paged_tables=False, client_side_data=False):
+    excluded = set()
+    if paged_tables:
+        excluded |= PAGED_OUTPUTS
+    if client_side_data:
+        excluded |= CLIENT_OUTPUTS
+    return [entry for entry in DASHBOARD_OUTPUTS if str(entry[0]) not in excluded]
+
+
+# Callback to update the whole dashboard in one request. ``changed`` holds
+# the Selection fields whose dropdown changed; outputs that do not depend on
+# any of them are left as they are, and figures are patched where they can
+# be. None (the initial call) fills everything.
+def update_dashboard(dataset, language, selected_student, selected_year, selected_subject, changed=None, figure_cache=None, outputs=DASHBOARD_OUTPUTS):
+    selection = Selection(dataset, language, selected_student, selected_year, selected_subject, figure_cache, changed)
+    return tuple(
+        build(selection) if changed is None or depends_on & changed else no_update
+        for _, build, depends_on in outputs
+    )
+
+
+# Bind a callback function to the dataset it reads from, timing each call
+# for /metrics
+def _bind(func, dataset, **kwargs):
+    @wraps(func)
+    def callback(*args):
+        with time_callback(func.__name__):
+            return resolve(func(dataset, *args, **kwargs))
+
+    return callback
+
+
+# Selection fields whose dropdown triggered the running callback, or None
+# on the initial call
+def _changed_fields():
+    fields = {component: field for field, component in DASHBOARD_INPUTS.items()}
+    return {fields[prop_id.split(".")[0]] for prop_id in ctx.triggered_prop_ids} or None
+
+
+# Selection fields the given dashboard outputs depend on, in DASHBOARD_INPUTS
+# order: the consolidated callback only listens to those dropdowns
+def dashboard_fields(outputs):
+    depends_on = set().union(*(fields for _, _, fields in outputs))
+    return [field for field in DASHBOARD_INPUTS if field in depends_on]
+
+
+# The callback receives one value per field in ``fields``; the others are None
+def _bind_dashboard(dataset, figure_cache, outputs, fields):
+    @wraps(update_dashboard)
+    def callback(*args):
+        values = dict(zip(fields, args))
+        with time_callback(update_dashboard.__name__):
+            return resolve(update_dashboard(
+                dataset, *(values.get(field) for field in DASHBOARD_INPUTS),
+                changed=_changed_fields(), figure_cache=figure_cache, outputs=outputs
+            ))
+
+    return callback
+
+
+# Bind a figure callback, telling it which dropdowns changed so it can patch
+def _bind_figure(func, dataset, figure_cache):
+    @wraps(func)
+    def callback(*args):
+        with time_callback(func.__name__):
+            return resolve(func(dataset, *args, figure_cache=figure_cache, changed=_changed_fields()))
+
+    return callback
+
+
+def _register_paged_tables(app, dataset):
+    app.callback(
+        Output("student-dropdown", "options"),
+        [Input("student-dropdown", "search_value")],
+        [State("student-dropdown", "value")]
+    )(_bind(update_student_options, dataset))
+
+    app.callback(
+        [Output("summary-table", "data"),
+         Output("summary-table", "page_count")],
+        [Input("summary-table", "page_current"),
+         Input("summary-table", "page_size"),
+         Input("summary-table", "sort_by"),
+         Input("summary-table", "filter_query"),
+         Input("language-dropdown", "value")]
+    )(_bind(update_summary_page, dataset))
+
+    app.callback(
+        [Output("exam-table", "data"),
+         Output("exam-table", "page_count")],
+        [Input("exam-table", "page_current"),
+         Input("exam-table", "page_size"),
+         Input("exam-table", "sort_by"),
+         Input("exam-table", "filter_query"),
+         Input("language-dropdown", "value"),
+         Input("subject-dropdown", "value")]
+    )(_bind(update_exam_page, dataset))
+
+
+def _register_client_side(app, dataset, paged_tables):
+    app.callback(
+        Output("student-store", "data"),
+        [Input("student-dropdown", "value")]
+    )(_bind(update_student_store, dataset))
+
+    if not paged_tables:
+        app.clientside_callback(
+            ClientsideFunction("dashboard", "summary_records"),
+            Output("summary-table", "data"),
+            [Input("student-store", "data"), Input("year-dropdown", "value"), Input("language-dropdown", "value")],
+            [State("i18n-catalog", "data")]
+        )
+        app.clientside_callback(
+            ClientsideFunction("dashboard", "exam_records"),
+            Output("exam-table", "data"),
+            [Input("student-store", "data"), Input("year-dropdown", "value"), Input("language-dropdown", "value")],
+            [State("i18n-catalog", "data")]
+        )
+
+    app.clientside_callback(
+        ClientsideFunction("dashboard", "performance_figure"),
+        Output("performance-over-time", "figure"),
+        [Input("student-store", "data"),
+         Input("year-dropdown", "value"),
+         Input("subject-dropdown", "value"),
+         Input("language-dropdown", "value")],
+        [State("figure-template", "data"), State("i18n-catalog", "data")]
+    )
+    app.clientside_callback(
+        ClientsideFunction("dashboard", "subject_figure"),
+        Output("subject-performance-chart", "figure"),
+        [Input("student-store", "data"), Input("year-dropdown", "value"), Input("language-dropdown", "value")],
+        [State("figure-template", "data"), State("i18n-catalog", "data")]
+    )
+
+
+# Language switching runs in the browser from the precompiled i18n-catalog
+def _register_language(app):
+    app.clientside_callback(
+        ClientsideFunction("dashboard", "apply_language"),
+        [Output("year-dropdown", "options"),
+         Output("student-label", "children"),
+         Output("dashboard-title", "children"),
+         Output("grade-label", "children"),
+         Output("subject-label", "children"),
+         Output("average-label", "children"),
+         Output("summary-table", "columns"),
+         Output("exam-table", "columns")],
+        [Input("language-dropdown", "value"),
+         Input("subject-dropdown", "value")],
+        [State("i18n-catalog", "data")]
+    )
+
+
+# Register the callbacks: one consolidated callback by default, or the
+# original separate callbacks (one request each) when split is True. Labels,
+# column headers and year options always switch language in the browser. With
+# paged_tables the summary and exam tables list the whole dataset and are
+# paged, sorted and filtered by their own callbacks. With client_side_data
+# the selected student's data is sent to the browser once and the tables
+# and charts are rebuilt there.
+def register_callbacks(app, dataset, split=False, figure_cache=None, paged_tables=False, client_side_data=False):
+    _register_language(app)
+    if paged_tables:
+        _register_paged_tables(app, dataset)
+    if client_side_data:
+        _register_client_side(app, dataset, paged_tables)
+
+    if not split:
+        outputs = dashboard_outputs(paged_tables, client_side_data)
+        fields = dashboard_fields(outputs)
+        app.callback(
+            [output for output, _, _ in outputs],
+            [Input(DASHBOARD_INPUTS[field], "value") for field in fields]
+        )(_bind_dashboard(dataset, figure_cache, outputs, fields))
+        return
+
+    app.callback(
+        [Output('average-value', 'children'),
+         Output('student-image', 'src'),
+         Output('student-image', 'srcSet'),
+         Output('student-image-webp', 'srcSet')],
+        [Input('student-dropdown', 'value')]
+    )(_bind(update_card, dataset))
+
+    if not (paged_tables or client_side_data):
+        app.callback(
+            Output("summary-table", "data"),
+            [Input("student-dropdown", 'value'), Input("year-dropdown", 'value'), Input("language-dropdown", 'value')]
+        )(_bind(update_summary_table, dataset))
+
+        app.callback(
+            Output("exam-table", "data"),
+            [Input("language-dropdown", "value"),
+             Input("student-dropdown", "value"),
+             Input("year-dropdown", "value")]
+        )(_bind(update_exam_table, dataset))
+
+    if client_side_data:
+        return
+
+    app.callback(
+        Output("performance-over-time", "figure"),
+        [
+            Input("student-dropdown", "value"),
+            Input("year-dropdown", "value"),
+            Input("subject-dropdown", "value"),
+            Input('language-dropdown', 'value')
+        ],
+    )(_bind_figure(update_performance_chart, dataset, figure_cache))
+
+    app.callback(
+        Output("subject-performance-chart", "figure"),
+        [Input("student-dropdown", "value"), Input("year-dropdown", "value"), Input('language-dropdown', 'value')],
+    )(_bind_figure(update_subject_performance_chart, dataset, figure_cache))
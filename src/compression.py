@@ -0,0 +1,256 @@
+"""Compressed responses and precompressed static files.
+
+    python -m src.compression [--output data/.static]
+
+writes a brotli and a gzip copy of every Dash bundle and file in
+src/assets/ ahead of time (run it at build time, see bin/post_compile).
+``init_app`` serves those copies to browsers that accept them and
+compresses other responses (callbacks, layout, index) on the fly.
+"""
+import argparse
+import gzip
+import hashlib
+import importlib
+import json
+import mimetypes
+import os
+from functools import wraps
+from pathlib import Path
+
+from dash.fingerprint import check_fingerprint
+from flask import request, send_file
+
+try:
+    import brotli
+except ImportError:  # gzip only
+    brotli = None
+
+from src.data_source import DEFAULT_CSV_PATH
+
+# Precompressed copies are written next to the data unless PRECOMPRESSED_DIR says otherwise
+DEFAULT_STATIC_DIR = DEFAULT_CSV_PATH.parent / ".static"
+ASSETS_DIR = Path(__file__).resolve().parent / "assets"
+
+COMPONENT_SUITES_PATH = "/_dash-component-suites"
+ASSETS_PATH = "/assets"
+
+# Content-Encoding -> file suffix, in order of preference
+ENCODINGS = {"br": ".br", "gzip": ".gz"} if brotli is not None else {"gzip": ".gz"}
+
+# Responses worth compressing; images and fonts are compressed already
+COMPRESSIBLE_TYPES = {
+    "application/javascript",
+    "application/json",
+    "image/svg+xml",
+    "image/vnd.microsoft.icon",
+    "image/x-icon",
+    "text/css",
+    "text/html",
+    "text/javascript",
+    "text/plain",
+}
+PACKAGE_SUFFIXES = {".js", ".css", ".map"}
+ASSET_SUFFIXES = {".js", ".css", ".map", ".svg", ".json", ".ico"}
+
+# Fingerprinted URLs change with their content, so browsers may keep them
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+
+# Fast settings for responses compressed per request, the smallest output
+# for files compressed once at build time
+def compress(data, encoding, best=False):
+    if encoding == "br":
+        return brotli.compress(data, quality=11 if best else 5)
+    return gzip.compress(data, compresslevel=9 if best else 6, mtime=0)
+
+
+# The best encoding the request accepts out of ``available``, or None
+def accepted_encoding(available=ENCODINGS):
+    for encoding in available:
+        if request.accept_encodings.quality(encoding) > 0:
+            return encoding
+    return None
+
+
+def _package_dir(package_name):
+    return Path(importlib.import_module(package_name).__file__).parent
+
+
+# Files served as Dash bundles and assets, by URL path, as (package, path
+# relative to the package directory) pairs; package None is src/assets/.
+# Relative, so a manifest written at build time still resolves once the
+# app runs from another directory (Heroku builds under /tmp, runs in /app).
+def static_sources(min_bytes):
+    from dash.development.base_component import ComponentRegistry
+
+    import src.layout  # noqa: F401  (registers the component packages the page uses)
+
+    sources = {}
+    for package_name in sorted(ComponentRegistry.registry):
+        package_dir = _package_dir(package_name)
+        for path in package_dir.rglob("*"):
+            if path.suffix in PACKAGE_SUFFIXES and path.is_file():
+                relative = path.relative_to(package_dir).as_posix()
+                sources[f"{COMPONENT_SUITES_PATH}/{package_name}/{relative}"] = (package_name, relative)
+    for path in ASSETS_DIR.rglob("*"):
+        if path.suffix in ASSET_SUFFIXES and path.is_file():
+            relative = path.relative_to(ASSETS_DIR).as_posix()
+            sources[f"{ASSETS_PATH}/{relative}"] = (None, relative)
+    return {
+        url: source for url, source in sources.items()
+        if source_path(*source).stat().st_size >= min_bytes
+    }
+
+
+# Where a static file is in this installation
+def source_path(package, path):
+    return (ASSETS_DIR if package is None else _package_dir(package)) / path
+
+
+def _sha256(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+# Write every encoding of every static file to ``directory``, with a
+# manifest recording which source file and version each copy was made from
+def precompress(directory=DEFAULT_STATIC_DIR, min_bytes=1024):
+    directory = Path(directory)
+    manifest = {}
+    for url, (package, path) in sorted(static_sources(min_bytes).items()):
+        data = source_path(package, path).read_bytes()
+        target = directory / url.lstrip("/")
+        target.parent.mkdir(parents=True, exist_ok=True)
+        encodings = []
+        for encoding, suffix in ENCODINGS.items():
+            compressed = compress(data, encoding, best=True)
+            if len(compressed) >= len(data):
+                continue
+            target.with_name(target.name + suffix).write_bytes(compressed)
+            encodings.append(encoding)
+        if encodings:
+            manifest[url] = {
+                "package": package,
+                "path": path,
+                "size": len(data),
+                "sha256": _sha256(data),
+                "encodings": encodings,
+            }
+    (directory / "manifest.json").write_text(json.dumps(manifest, indent=2, sort_keys=True))
+    return manifest
+
+
+class PrecompressedFiles:
+    """Serves the copies written by ``precompress``.
+
+    Copies whose source file has changed since (a package upgrade, an
+    edited asset) are ignored, so the uncompressed file is served instead.
+    Sources are compared by size and content hash, once at startup.
+    """
+
+    def __init__(self, directory=DEFAULT_STATIC_DIR):
+        self.directory = Path(directory)
+        try:
+            manifest = json.loads((self.directory / "manifest.json").read_text())
+        except (OSError, ValueError):
+            manifest = {}
+        self.files = {url: entry for url, entry in manifest.items() if self._current(entry)}
+
+    @staticmethod
+    def _current(entry):
+        try:
+            path = source_path(entry["package"], entry["path"])
+            if path.stat().st_size != entry["size"]:
+                return False
+            return _sha256(path.read_bytes()) == entry["sha256"]
+        except (ImportError, KeyError, OSError, TypeError):
+            return False
+
+    def response(self, url, fingerprinted):
+        entry = self.files.get(url)
+        if entry is None:
+            return None
+        encoding = accepted_encoding([encoding for encoding in ENCODINGS if encoding in entry["encodings"]])
+        if encoding is None:
+            return None
+        path = self.directory / (url.lstrip("/") + ENCODINGS[encoding])
+        mimetype = mimetypes.guess_type(entry["path"])[0] or "application/octet-stream"
+        # Without a fingerprint, browsers revalidate with the ETag
+        max_age = IMMUTABLE_MAX_AGE if fingerprinted else None
+        response = send_file(path, mimetype=mimetype, conditional=True, etag=True, max_age=max_age)
+        response.headers["Content-Encoding"] = encoding
+        response.vary.add("Accept-Encoding")
+        if fingerprinted:
+            response.cache_control.public = True
+            response.cache_control.immutable = True
+        return response
+
+
+def _wrap_view(server, endpoint, resolve):
+    view = server.view_functions[endpoint]
+
+    @wraps(view)
+    def precompressed_view(**kwargs):
+        url, fingerprinted = resolve(**kwargs)
+        response = server.extensions["precompressed"].response(url, fingerprinted)
+        return response if response is not None else view(**kwargs)
+
+    server.view_functions[endpoint] = precompressed_view
+
+
+def _component_suite(package_name, fingerprinted_path):
+    path, fingerprinted = check_fingerprint(fingerprinted_path)
+    return f"{COMPONENT_SUITES_PATH}/{package_name}/{path}", fingerprinted
+
+
+# Dash adds ?m=<modified time> to the asset URLs it writes into the page
+def _asset(filename):
+    return f"{ASSETS_PATH}/{filename}", "m" in request.args
+
+
+# Serve the precompressed copies in ``static`` (a PrecompressedFiles) from
+# the Dash bundle and asset routes, and compress other responses of at
+# least ``min_bytes`` on the fly. Call it before basic auth is set up so
+# the wrapped routes stay protected, and before any other after_request
+# hook: Flask runs those in reverse order, so compression is then the last
+# thing done to the response.
+def init_app(server, min_bytes=1024, static=None):
+    if static is not None:
+        server.extensions["precompressed"] = static
+        for rule in list(server.url_map.iter_rules()):
+            if rule.rule.startswith(f"{COMPONENT_SUITES_PATH}/"):
+                _wrap_view(server, rule.endpoint, _component_suite)
+            elif rule.rule == f"{ASSETS_PATH}/<path:filename>":
+                _wrap_view(server, rule.endpoint, _asset)
+
+    @server.after_request
+    def compress_response(response):
+        if (
+            response.status_code != 200
+            or response.direct_passthrough
+            or response.is_streamed
+            or "Content-Encoding" in response.headers
+            or response.mimetype not in COMPRESSIBLE_TYPES
+        ):
+            return response
+        response.vary.add("Accept-Encoding")
+        data = response.get_data()
+        encoding = accepted_encoding()
+        if len(data) < min_bytes or encoding is None:
+            return response
+        response.set_data(compress(data, encoding))
+        response.headers["Content-Encoding"] = encoding
+        return response
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Precompress the Dash bundles and assets.")
+    parser.add_argument("--output", type=Path, default=Path(os.getenv("PRECOMPRESSED_DIR") or DEFAULT_STATIC_DIR))
+    parser.add_argument("--min-bytes", type=int, default=1024, help="skip smaller files")
+    args = parser.parse_args(argv)
+
+    manifest = precompress(args.output, args.min_bytes)
+    print(f"precompressed {len(manifest)} files ({', '.join(ENCODINGS)}) into {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+import os
+from dataclasses import dataclass
+
+from dotenv import load_dotenv
+
+
+def env_flag(name, default=False):
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def env_str(name, default=None):
+    value = os.getenv(name)
+    if value is None or not value.strip():
+        return default
+    return value.strip()
+
+
+def env_int(name, default):
+    value = os.getenv(name)
+    if value is None or not value.strip():
+        return default
+    return int(value)
+
+
+@dataclass
+class Config:
+    """Settings for ``create_app``.
+
+    Build one directly in tests and benchmarks, or with ``Config.from_env()``
+    to read the deployment settings from the environment / ``.env`` file.
+    Basic authentication is only installed when both credentials are set.
+    """
+
+    secret_key: str = None
+    auth_username: str = None
+    auth_password: str = None
+    # Register the original one-callback-per-output set instead of the
+    # single consolidated callback (SPLIT_CALLBACKS)
+    split_callbacks: bool = False
+    # Bounds of the in-process figure cache; 0 entries disables it
+    # (FIGURE_CACHE_ENTRIES, FIGURE_CACHE_BYTES)
+    figure_cache_entries: int = 1024
+    figure_cache_bytes: int = 64 * 1024 * 1024
+    # Keep cached figures as encoded JSON bytes and splice them into the
+    # callback response instead of re-serializing them (ENCODED_FIGURES)
+    encoded_figures: bool = True
+    # Page, sort and filter the summary and exam tables over the whole
+    # dataset on the server (PAGED_TABLES)
+    paged_tables: bool = False
+    # Send the selected student's data to the browser once and rebuild the
+    # tables and charts there with clientside callbacks (CLIENT_SIDE_DATA)
+    client_side_data: bool = False
+    # Figure cache shared by all worker processes: "filesystem", "sqlite" or
+    # unset for none (SHARED_CACHE). The directory or database file, the
+    # seconds an entry stays valid and the size bound are SHARED_CACHE_PATH,
+    # SHARED_CACHE_TTL and SHARED_CACHE_BYTES.
+    shared_cache: str = None
+    shared_cache_path: str = None
+    shared_cache_ttl: int = 3600
+    shared_cache_bytes: int = 256 * 1024 * 1024
+    # Build every chart of the first WARMUP_STUDENTS students (0 for all)
+    # into the figure cache on WARMUP_THREADS threads at startup (WARMUP).
+    # With WARMUP_WAIT the app is returned only once that is done, so under
+    # gunicorn --preload the master warms up and the workers fork warm;
+    # otherwise it runs in the background and /ready answers 503 meanwhile.
+    warmup: bool = False
+    warmup_students: int = 0
+    warmup_threads: int = 4
+    warmup_wait: bool = False
+    # Time every callback by phase and serve the timings, cache counters
+    # and dataset size on /metrics in the Prometheus text format (METRICS)
+    metrics: bool = True
+    # Add a Server-Timing header with the same phase breakdown to every
+    # callback response, for the browser's devtools (SERVER_TIMING)
+    server_timing: bool = False
+    # Profile callback requests: "always" for every one, "signed" for those
+    # flagged with a signed ?profile= token, unset for none (PROFILER).
+    # Profiles are written to PROFILE_DIR.
+    profiler: str = None
+    profile_dir: str = None
+    # Serve the students' photos as resized WebP/JPEG copies from /images
+    # instead of linking the originals (IMAGES); the copies are kept in
+    # IMAGE_DIR
+    images: bool = True
+    image_dir: str = None
+    # Compress responses of at least COMPRESS_MIN_BYTES with brotli or gzip
+    # (COMPRESS), serving the Dash bundles and assets from the copies made
+    # by ``python -m src.compression`` in PRECOMPRESSED_DIR when present
+    compress: bool = True
+    compress_min_bytes: int = 1024
+    precompressed_dir: str = None
+    # Tag callback, index, layout and dependencies responses with ETags and
+    # answer repeated requests with 304 Not Modified without redoing them
+    # (ETAGS)
+    etags: bool = True
+
+    @classmethod
+    def from_env(cls):
+        # Load environment variables from .env file
+        load_dotenv()
+
+        config = cls(
+            secret_key=os.getenv("SECRET_KEY"),
+            auth_username=os.getenv("AUTH_USERNAME"),
+            auth_password=os.getenv("AUTH_PASSWORD"),
+            split_callbacks=env_flag("SPLIT_CALLBACKS"),
+            figure_cache_entries=env_int("FIGURE_CACHE_ENTRIES", cls.figure_cache_entries),
+            figure_cache_bytes=env_int("FIGURE_CACHE_BYTES", cls.figure_cache_bytes),
+            encoded_figures=env_flag("ENCODED_FIGURES", cls.encoded_figures),
+            paged_tables=env_flag("PAGED_TABLES"),
+            client_side_data=env_flag("CLIENT_SIDE_DATA"),
+            shared_cache=env_str("SHARED_CACHE"),
+            shared_cache_path=env_str("SHARED_CACHE_PATH"),
+            shared_cache_ttl=env_int("SHARED_CACHE_TTL", cls.shared_cache_ttl),
+            shared_cache_bytes=env_int("SHARED_CACHE_BYTES", cls.shared_cache_bytes),
+            warmup=env_flag("WARMUP"),
+            warmup_students=env_int("WARMUP_STUDENTS", cls.warmup_students),
+            warmup_threads=env_int("WARMUP_THREADS", cls.warmup_threads),
+            warmup_wait=env_flag("WARMUP_WAIT"),
+            metrics=env_flag("METRICS", cls.metrics),
+            server_timing=env_flag("SERVER_TIMING"),
+            profiler=env_str("PROFILER"),
+            profile_dir=env_str("PROFILE_DIR"),
+            images=env_flag("IMAGES", cls.images),
+            image_dir=env_str("IMAGE_DIR"),
+            compress=env_flag("COMPRESS", cls.compress),
+            compress_min_bytes=env_int("COMPRESS_MIN_BYTES", cls.compress_min_bytes),
+            precompressed_dir=env_str("PRECOMPRESSED_DIR"),
+            etags=env_flag("ETAGS", cls.etags),
+        )
+
+        # Ensure the secret key is loaded correctly
+        if not config.secret_key:
+            raise ValueError(
+                "No SECRET_KEY set for Flask application. Did you follow the instructions to set up the .env file?"
+            )
+
+        # Ensure auth credentials are loaded correctly
+        if not config.auth_username or not config.auth_password:
+            raise ValueError(
+                "Authentication credentials are not set properly in the .env file."
+            )
+        return config
@@ -0,0 +1,204 @@
+import hashlib
+import io
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import requests
+
+# Location of the dataset shipped with the repository
+DEFAULT_CSV_PATH = Path(__file__).resolve().parent.parent / "data" / "grades_over_time .csv"
+
+# Snapshots are written next to the data unless SNAPSHOT_DIR says otherwise
+DEFAULT_SNAPSHOT_DIR = DEFAULT_CSV_PATH.parent / ".snapshots"
+
+# Bump when the snapshot layout changes so old files are ignored
+SNAPSHOT_FORMAT = 1
+
+
+def file_digest(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, "rb") as handle:
+        for chunk in iter(lambda: handle.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+# Write a DataFrame as an uncompressed .npz with one array per column.
+# Text columns are stored as fixed-width unicode arrays plus a missing-value
+# mask so the file can be read back without pickle.
+def write_snapshot(df, path):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    arrays = {
+        "__format__": np.array(SNAPSHOT_FORMAT),
+        "__columns__": np.array(df.columns, dtype=str),
+    }
+    for i, col in enumerate(df.columns):
+        series = df[col]
+        if pd.api.types.is_numeric_dtype(series):
+            arrays[f"c{i}"] = series.to_numpy()
+        else:
+            arrays[f"c{i}"] = series.fillna("").to_numpy(dtype=str)
+            arrays[f"m{i}"] = series.isna().to_numpy()
+    # Write to a temporary file first so concurrent readers never see a partial snapshot
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, "wb") as handle:
+        np.savez(handle, **arrays)
+    os.replace(tmp_path, path)
+
+
+def read_snapshot(path):
+    with np.load(path, allow_pickle=False) as snapshot:
+        if int(snapshot["__format__"]) != SNAPSHOT_FORMAT:
+            raise ValueError(f"Unsupported snapshot format in {path}")
+        data = {}
+        for i, col in enumerate(snapshot["__columns__"].tolist()):
+            values = snapshot[f"c{i}"]
+            if f"m{i}" in snapshot.files:
+                values = values.astype(object)
+                values[snapshot[f"m{i}"]] = np.nan
+            data[col] = values
+    return pd.DataFrame(data)
+
+
+class DataSource:
+    """Somewhere the grades dataset can be loaded from.
+
+    ``version`` identifies the content of the dataset so anything derived
+    from it (snapshots, caches) can tell when it has changed.
+    """
+
+    def load(self):
+        raise NotImplementedError
+
+    @property
+    def version(self):
+        raise NotImplementedError
+
+
+class CsvDataSource(DataSource):
+    """Read a local CSV file, keeping a binary snapshot keyed by its content hash.
+
+    The first load parses the CSV and writes ``<stem>-<hash>.npz`` into
+    ``snapshot_dir``; later loads of the same file read the snapshot instead.
+    Pass ``snapshot_dir=None`` to always parse the CSV.
+    """
+
+    def __init__(self, path=DEFAULT_CSV_PATH, snapshot_dir=DEFAULT_SNAPSHOT_DIR):
+        self.path = Path(path)
+        self.snapshot_dir = Path(snapshot_dir) if snapshot_dir else None
+        self._version = None
+
+    @property
+    def version(self):
+        if self._version is None:
+            self._version = file_digest(self.path)
+        return self._version
+
+    def snapshot_path(self):
+        stem = self.path.stem.strip().replace(" ", "_")
+        return self.snapshot_dir / f"{stem}-{self.version[:16]}.npz"
+
+    def load(self):
+        if self.snapshot_dir is None:
+            return pd.read_csv(self.path)
+
+        snapshot = self.snapshot_path()
+        if snapshot.exists():
+            try:
+                return read_snapshot(snapshot)
+            except (OSError, ValueError, KeyError):
+                # Corrupt or outdated snapshot, fall through and rebuild it
+                pass
+
+        df = pd.read_csv(self.path)
+        try:
+            write_snapshot(df, snapshot)
+            self._remove_stale_snapshots(snapshot)
+        except OSError:
+            # A read-only filesystem only costs us the faster next boot
+            pass
+        return df
+
+    def _remove_stale_snapshots(self, current):
+        prefix = current.name.rsplit("-", 1)[0] + "-"
+        for path in self.snapshot_dir.glob(f"{prefix}*.npz"):
+            if path != current:
+                path.unlink(missing_ok=True)
+
+
+class SnapshotDataSource(DataSource):
+    """Read a binary ``.npz`` snapshot directly, e.g. one written by ``src.synthetic``."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._version = None
+
+    @property
+    def version(self):
+        if self._version is None:
+            self._version = file_digest(self.path)
+        return self._version
+
+    def load(self):
+        return read_snapshot(self.path)
+
+
+class UrlDataSource(DataSource):
+    """Read a CSV over HTTP(S), as the app originally did. Nothing is cached.
+
+    The version is the hash of the bytes last downloaded, so it changes
+    when the file at the URL does.
+    """
+
+    def __init__(self, url, timeout=60):
+        self.url = url
+        self.timeout = timeout
+        self._version = None
+
+    def _fetch(self):
+        response = requests.get(self.url, timeout=self.timeout)
+        response.raise_for_status()
+        self._version = hashlib.sha256(response.content).hexdigest()
+        return response.content
+
+    @property
+    def version(self):
+        if self._version is None:
+            self._fetch()
+        return self._version
+
+    def load(self):
+        return pd.read_csv(io.BytesIO(self._fetch()))
+
+
+class FrameDataSource(DataSource):
+    """Serve an in-memory DataFrame, e.g. synthetic data in tests and benchmarks."""
+
+    def __init__(self, df, version=None):
+        self.df = df
+        self._version = version
+
+    @property
+    def version(self):
+        if self._version is None:
+            hashes = pd.util.hash_pandas_object(self.df, index=False).to_numpy()
+            self._version = hashlib.sha256(hashes.tobytes()).hexdigest()
+        return self._version
+
+    def load(self):
+        return self.df.copy()
+
+
+# Pick the data source from the environment: DATA_URL wins over DATA_PATH
+# (a CSV, or an .npz snapshot), and the CSV bundled in data/ is the default.
+def data_source_from_env():
+    url = os.getenv("DATA_URL")
+    if url:
+        return UrlDataSource(url)
+    path = os.getenv("DATA_PATH", DEFAULT_CSV_PATH)
+    if Path(path).suffix == ".npz":
+        return SnapshotDataSource(path)
+    return CsvDataSource(path, os.getenv("SNAPSHOT_DIR", DEFAULT_SNAPSHOT_DIR))
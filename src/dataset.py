@@ -0,0 +1,145 @@
+import logging
+from functools import cached_property
+
+import numpy as np
+import pandas as pd
+
+from src.grade_tensor import GradeTensor
+from src.table_query import TableQuery
+
+logger = logging.getLogger(__name__)
+
+# List of all possible years/grades
+all_years = [
+    "K",
+    "1st",
+    "2nd",
+    "3rd",
+    "4th",
+    "5th",
+    "6th",
+    "7th",
+    "8th",
+    "9th",
+    "10th",
+    "11th",
+    "12th",
+]
+
+# Subjects graded in every year, each with three exams
+subjects = [
+    "Matematicas",
+    "Literatura",
+    "English",
+    "Deporte",
+    "Geography",
+    "Art",
+    "Biologia",
+    "Orientacion",
+    "Participacion",
+]
+
+
+# Function to fill missing years with placeholder data: reindex on the full
+# (Name, Year) product so every student gets a row for every year, with NaN
+# grades for the years they have no data for. Years missing from all_years
+# are dropped. A student listed twice for the same year keeps the last row.
+def fill_missing_years(df, all_years):
+    duplicated = df.duplicated(["Name", "Year"], keep="last")
+    if duplicated.any():
+        pairs = df.loc[duplicated, ["Name", "Year"]].drop_duplicates()
+        logger.warning(
+            "Keeping the last of the duplicate rows for %d (Name, Year) pairs: %s",
+            len(pairs),
+            ", ".join(f"{name} / {year}" for name, year in pairs.head(10).itertuples(index=False)),
+        )
+        df = df[~duplicated]
+    students = df["Name"].unique()
+    full_index = pd.MultiIndex.from_product([students, all_years], names=["Name", "Year"])
+    filled = df.set_index(["Name", "Year"]).reindex(full_index)
+
+    # Placeholder rows keep the student's image
+    image_urls = filled["Image URL"]
+    filled["Image URL"] = image_urls.fillna(image_urls.groupby(level="Name").transform("first"))
+
+    filled = filled.reset_index()[df.columns]
+
+    # Store the text columns as categoricals: Year is ordered by grade so
+    # sorts and comparisons follow K, 1st, ..., 12th and run on integer codes
+    filled["Name"] = filled["Name"].astype("category")
+    filled["Image URL"] = filled["Image URL"].astype("category")
+    filled["Year"] = pd.Categorical(filled["Year"], categories=all_years, ordered=True)
+
+    return filled.sort_values(by=["Name", "Year"])
+
+
+# Fill missing years, build the grade tensor and copy its per-subject and
+# overall averages into the frame. Returns the full frame, the summary table
+# and the tensor.
+def prepare_grades(df):
+    # Fill missing years
+    df = fill_missing_years(df, all_years)
+
+    # Ensure grades are numeric
+    for col in df.columns[3:]:
+        df[col] = pd.to_numeric(df[col], errors="coerce")
+
+    grades = GradeTensor.from_frame(df, subjects)
+    student_codes = df["Name"].cat.codes.to_numpy()
+    year_codes = df["Year"].cat.codes.to_numpy()
+
+    # Final grades are the rounded averages of the sublevels
+    averages = grades.subject_averages[student_codes, year_codes].astype(np.float64)
+    for i, subject in enumerate(subjects):
+        df[f"{subject}"] = averages[:, i]
+
+    # Final grade average across all subjects
+    df["Grade Average"] = grades.grade_averages[student_codes, year_codes].astype(np.float64)
+
+    # Prepare the summary table with only final grades
+    summary_df = df[
+        ["Name", "Image URL", "Year"]
+        + [f"{subject}" for subject in subjects]
+        + ["Grade Average"]
+    ]
+    return df, summary_df, grades
+
+
+class Dataset:
+    """The prepared grades every callback reads from.
+
+    ``df`` and ``summary_df`` hold the rows shown in the tables, ``grades``
+    the same numbers as a ``GradeTensor`` for the charts and averages.
+
+    Built once per process (in the gunicorn master when ``--preload`` is
+    used) and never mutated afterwards, so forked workers share its memory.
+    """
+
+    def __init__(self, df, summary_df, grades, version):
+        self.df = df
+        self.summary_df = summary_df
+        self.grades = grades
+        self.version = version
+
+        # Positional row of every (student, year) pair in df / summary_df,
+        # indexed by the tensor's student and year codes (-1 if absent)
+        self.row_positions = np.full(grades.grades.shape[:2], -1, dtype=np.int64)
+        self.row_positions[df["Name"].cat.codes, df["Year"].cat.codes] = np.arange(len(df))
+
+    # Server-side paging over the summary and exam tables
+    @cached_property
+    def summary_query(self):
+        return TableQuery(self, self.summary_df)
+
+    @cached_property
+    def exam_query(self):
+        return TableQuery(self, self.df)
+
+    @classmethod
+    def from_frame(cls, raw_df, version=None):
+        df, summary_df, grades = prepare_grades(raw_df)
+        return cls(df, summary_df, grades, version)
+
+    @classmethod
+    def from_source(cls, data_source):
+        return cls.from_frame(data_source.load(), data_source.version)
@@ -0,0 +1,70 @@
+import json
+import uuid
+
+from flask import g, has_request_context, request
+from plotly.io.json import to_json_plotly
+
+from src.metrics import timed_phase
+
+try:
+    import orjson  # noqa: F401
+
+    JSON_ENGINE = "orjson"
+except ImportError:
+    JSON_ENGINE = "json"
+
+# Callback responses are spliced on this route only
+UPDATE_COMPONENT_PATH = "/_dash-update-component"
+
+
+class EncodedJSON:
+    """A callback output that has already been encoded to JSON bytes.
+
+    Inside a request, ``resolve`` swaps it for a placeholder string that the
+    ``after_request`` hook installed by ``init_app`` replaces with the bytes,
+    so Dash never walks the encoded value again. Anywhere else plotly's
+    encoder falls back to ``to_plotly_json``.
+    """
+
+    __slots__ = ("data",)
+
+    def __init__(self, data):
+        self.data = data
+
+    def __len__(self):
+        return len(self.data)
+
+    def to_plotly_json(self):
+        return json.loads(self.data)
+
+
+@timed_phase("serialize")
+def encode_figure(figure):
+    return EncodedJSON(to_json_plotly(figure, engine=JSON_ENGINE).encode())
+
+
+# Replace EncodedJSON outputs (alone or in a multi-output tuple) with
+# placeholders for the current request
+def resolve(value):
+    if isinstance(value, tuple):
+        return tuple(resolve(item) for item in value)
+    if not isinstance(value, EncodedJSON) or not has_request_context():
+        return value
+    token = f"__encoded_json_{uuid.uuid4().hex}__"
+    if "encoded_json" not in g:
+        g.encoded_json = {}
+    g.encoded_json[token] = value.data
+    return token
+
+
+def init_app(server):
+    @server.after_request
+    def splice_encoded_json(response):
+        encoded = g.pop("encoded_json", None)
+        if not encoded or not request.path.endswith(UPDATE_COMPONENT_PATH):
+            return response
+        body = response.get_data()
+        for token, data in encoded.items():
+            body = body.replace(b'"' + token.encode() + b'"', data, 1)
+        response.set_data(body)
+        return response
@@ -0,0 +1,96 @@
+import hashlib
+import json
+from functools import cache, wraps
+from pathlib import Path
+
+import dash
+import plotly
+from flask import Response, make_response, request
+
+from src.encoded_json import UPDATE_COMPONENT_PATH
+
+SRC_DIR = Path(__file__).resolve().parent
+
+# Static views answered with 304 when the browser already has them: the
+# index page, the layout and the callback dependencies
+LAYOUT_PATHS = ("/", "/_dash-layout", "/_dash-dependencies")
+
+
+# The code, catalogs and libraries that turn the data into responses and
+# figures; hashed once per process
+@cache
+def code_version():
+    digest = hashlib.sha256(f"{dash.__version__}\0{plotly.__version__}\0".encode())
+    for path in sorted(SRC_DIR.rglob("*")):
+        if path.suffix in (".py", ".json", ".js") and path.is_file():
+            digest.update(path.relative_to(SRC_DIR).as_posix().encode())
+            digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+# What every response depends on besides the request: the dataset, the
+# code and the settings
+def response_version(dataset_version, settings):
+    digest = hashlib.sha256(f"{dataset_version}\0{code_version()}\0".encode())
+    digest.update(json.dumps(settings, sort_keys=True, default=str).encode())
+    return digest.hexdigest()
+
+
+# A callback response is a pure function of the callback, its input and
+# state values and which inputs changed
+def callback_etag(version, body):
+    values = {
+        "output": body.get("output"),
+        "inputs": [item.get("value") for item in body.get("inputs", [])],
+        "state": [item.get("value") for item in body.get("state", [])],
+        "changed": body.get("changedPropIds"),
+    }
+    key = json.dumps(values, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(f"{version}\0{key}".encode()).hexdigest()[:32]
+
+
+def _conditional(view, etag_for):
+    @wraps(view)
+    def conditional_view(*args, **kwargs):
+        etag = etag_for()
+        if etag is not None and request.if_none_match.contains_weak(etag):
+            response = Response(status=304)
+            response.set_etag(etag, weak=True)
+            return response
+        response = make_response(view(*args, **kwargs))
+        if etag is not None and response.status_code == 200:
+            response.set_etag(etag, weak=True)
+        return response
+
+    return conditional_view
+
+
+# Tag the callback, index, layout and dependencies responses with weak
+# ETags and answer matching If-None-Match requests with 304 before the view
+# runs (no pandas or Plotly work). The browser revalidates the pages on
+# its own; for callbacks, src/assets/etag_cache.js keeps recent responses
+# and sends their ETags. ``version`` is a string, or a function returning the current
+# one when it can change while the app runs. Call it before basic auth is
+# set up so auth still comes first.
+def init_app(server, version):
+    current_version = version if callable(version) else lambda: version
+
+    for path in LAYOUT_PATHS:
+        def layout_etag(path=path):
+            return hashlib.sha256(f"{current_version()}\0{path}".encode()).hexdigest()[:32]
+
+        server.view_functions[path] = _conditional(server.view_functions[path], layout_etag)
+
+    def update_etag():
+        body = request.get_json(silent=True)
+        return callback_etag(current_version(), body) if isinstance(body, dict) else None
+
+    server.view_functions[UPDATE_COMPONENT_PATH] = _conditional(
+        server.view_functions[UPDATE_COMPONENT_PATH], update_etag
+    )
+
+    @server.after_request
+    def revalidate_layout(response):
+        if request.path in LAYOUT_PATHS and response.status_code in (200, 304):
+            response.cache_control.no_cache = True
+        return response
@@ -0,0 +1,156 @@
+import json
+import os
+import threading
+import weakref
+from collections import OrderedDict
+
+import plotly.io as pio
+
+from src.encoded_json import EncodedJSON, encode_figure
+from src.shared_cache import cache_key
+from src.single_flight import SingleFlight
+
+
+# Live figure caches, reset by one hook in a forked child. The at-fork
+# registry keeps its hooks (and anything they reference) for good, so a
+# hook per cache would keep every cache and its figures alive.
+_caches = weakref.WeakSet()
+
+
+def _after_fork_in_child():
+    for instance in list(_caches):
+        instance._after_fork()
+
+
+os.register_at_fork(after_in_child=_after_fork_in_child)
+
+
+def figure_size(figure):
+    """Size in bytes of a figure as it is sent to the browser."""
+    if isinstance(figure, EncodedJSON):
+        return len(figure)
+    return len(pio.to_json(figure, validate=False))
+
+
+class FigureCache:
+    """LRU cache of built figures, bounded by entry count and total bytes.
+
+    Entries belong to one dataset version: a lookup with a different version
+    empties the cache first. ``max_entries=0`` disables caching. With
+    ``encode`` set, figures are stored and returned as ``EncodedJSON`` so a
+    hit costs no serialization. ``shared`` is an optional second level (see
+    ``src.shared_cache``) that every worker process reads and writes, so a
+    figure built by one worker is reused by the others; its keys also hold
+    ``code_version``, so workers running other code (during a deploy, or
+    after a library upgrade) never read each other's figures. Safe to use from
+    several threads; threads missing on the same key at the same time wait
+    for a single build and share it (counted as ``coalesced``).
+    """
+
+    def __init__(self, max_entries=1024, max_bytes=64 * 1024 * 1024, encode=True, sizeof=figure_size, shared=None, code_version=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.encode = encode
+        self.sizeof = sizeof
+        self.shared = shared
+        self.code_version = code_version
+        self.version = None
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.bytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._flight = SingleFlight()
+        _caches.add(self)
+
+    # Forked workers inherit the entries; the lock may have been held by a
+    # warmup thread at fork time
+    def _after_fork(self):
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get_or_build(self, version, key, build):
+        with self._lock:
+            if version != self.version:
+                self._clear()
+                self.version = version
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+
+        return self._flight.do((version, key), lambda: self._build_and_store(version, key, build))
+
+    def _build_and_store(self, version, key, build):
+        # A build that finished just before this one started may have
+        # stored the figure already
+        with self._lock:
+            entry = self._entries.get(key) if version == self.version else None
+        if entry is not None:
+            return entry[0]
+
+        figure = self._build(version, key, build)
+        if self.max_entries <= 0:
+            return figure
+
+        size = self.sizeof(figure)
+        if size > self.max_bytes:
+            return figure
+        with self._lock:
+            if version == self.version and key not in self._entries:
+                self._entries[key] = (figure, size)
+                self.bytes += size
+                self._evict()
+        return figure
+
+    # Build the figure, or load it from the shared cache when another
+    # worker has already built it for this dataset and code version
+    def _build(self, version, key, build):
+        if self.shared is None:
+            figure = build()
+            return encode_figure(figure) if self.encode else figure
+
+        shared_key = cache_key(self.code_version, version, *key)
+        data = self.shared.get(shared_key)
+        if data is not None:
+            with self._lock:
+                self.shared_hits += 1
+            return EncodedJSON(data) if self.encode else json.loads(data)
+
+        encoded = encode_figure(build())
+        self.shared.set(shared_key, encoded.data)
+        return encoded if self.encode else encoded.to_plotly_json()
+
+    def clear(self):
+        with self._lock:
+            self._clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self.bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "shared_hits": self.shared_hits,
+                "coalesced": self._flight.coalesced,
+                "evictions": self.evictions,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+            }
+
+    def _clear(self):
+        self._entries.clear()
+        self.bytes = 0
+
+    def _evict(self):
+        while len(self._entries) > self.max_entries or self.bytes > self.max_bytes:
+            _, (_, size) = self._entries.popitem(last=False)
+            self.bytes -= size
+            self.evictions += 1
@@ -0,0 +1,83 @@
+import numpy as np
+import pandas as pd
+
+EXAMS_PER_SUBJECT = 3
+
+
+# Mean over one axis ignoring NaN, NaN where every value is missing (like
+# DataFrame.mean) and without numpy's empty-slice warnings. Sums in float64 so
+# rounding matches the pandas averages the app used before.
+def _nanmean(values, axis):
+    present = ~np.isnan(values)
+    total = np.where(present, values, 0).sum(axis=axis, dtype=np.float64)
+    count = present.sum(axis=axis)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(count > 0, total / count, np.nan)
+
+
+class GradeTensor:
+    """Every exam grade in one dense ``float32`` array.
+
+    ``grades[student, year, subject, exam]`` is indexed by integer codes:
+    students in ``students`` order, years in ``years`` (grade) order and
+    subjects in ``subjects`` order. Years a student has no data for are NaN.
+    The subject and grade averages are computed once, rounded like the
+    tables show them, and kept alongside.
+    """
+
+    def __init__(self, grades, students, years, subjects):
+        self.grades = grades
+        self.students = pd.Index(students)
+        self.years = pd.Index(years)
+        self.subjects = pd.Index(subjects)
+
+        # Rounded average of the three exams, per student, year and subject
+        self.subject_averages = _nanmean(grades, axis=3).round(0).astype(np.float32)
+        # Rounded average of the subject averages, per student and year
+        self.grade_averages = _nanmean(self.subject_averages, axis=2).round(0).astype(np.float32)
+
+    # Build the tensor from a frame in the CSV schema whose Name and Year
+    # columns are categoricals, as returned by fill_missing_years
+    @classmethod
+    def from_frame(cls, df, subjects):
+        students = df["Name"].cat.categories
+        years = df["Year"].cat.categories
+        columns = [
+            f"{subject} Exam {n}"
+            for subject in subjects
+            for n in range(1, EXAMS_PER_SUBJECT + 1)
+        ]
+
+        grades = np.full(
+            (len(students), len(years), len(subjects), EXAMS_PER_SUBJECT),
+            np.nan,
+            dtype=np.float32,
+        )
+        values = df[columns].to_numpy(dtype=np.float32, na_value=np.nan)
+        grades[df["Name"].cat.codes, df["Year"].cat.codes] = values.reshape(
+            len(df), len(subjects), EXAMS_PER_SUBJECT
+        )
+        return cls(grades, students, years, subjects)
+
+    def student_code(self, student):
+        return self.students.get_loc(student)
+
+    def year_code(self, year):
+        return self.years.get_loc(year)
+
+    def subject_code(self, subject):
+        return self.subjects.get_loc(subject)
+
+    # Exam grades of one student in one year and subject (a view)
+    def exams(self, student, year, subject):
+        return self.grades[
+            self.student_code(student), self.year_code(year), self.subject_code(subject)
+        ]
+
+    # Subject averages of one student in one year (a view)
+    def year_subject_averages(self, student, year):
+        return self.subject_averages[self.student_code(student), self.year_code(year)]
+
+    # Mean of a student's grade averages over the years they have data for
+    def student_average(self, student):
+        return _nanmean(self.grade_averages[self.student_code(student)], axis=0).round(0)
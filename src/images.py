@@ -0,0 +1,295 @@
+"""Resized copies of the students' photos.
+
+    python -m src.images [--output data/.images]
+
+resizes every photo the dataset links to ahead of time (run it at build
+time, see bin/post_compile). At startup ``ImageStore.load`` only reads the
+manifest it writes; photos missing from it are resized in the background
+and shown as the placeholder until then.
+"""
+import argparse
+import hashlib
+import io
+import json
+import logging
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from urllib.parse import urlparse
+
+import requests
+from dotenv import load_dotenv
+from flask import abort, current_app, has_app_context, send_from_directory
+from PIL import Image, ImageOps
+
+from src.data_source import DEFAULT_CSV_PATH, data_source_from_env
+
+logger = logging.getLogger(__name__)
+
+# Resized photos are written next to the data unless IMAGE_DIR says otherwise
+DEFAULT_IMAGE_DIR = DEFAULT_CSV_PATH.parent / ".images"
+
+# Route serving the resized photos, and the image shown when a photo is missing
+IMAGE_PATH = "/images"
+PLACEHOLDER_SRC = "/assets/placeholder.svg"
+
+# Widths of the resized copies; the JPEG at FALLBACK_WIDTH is the card's
+# src, and the JPEG and WebP copies make up the srcsets of its <img> and
+# <source type="image/webp">
+IMAGE_WIDTHS = (160, 320, 640)
+FALLBACK_WIDTH = 320
+FORMATS = {
+    "webp": ("WEBP", {"quality": 80, "method": 6}),
+    "jpg": ("JPEG", {"quality": 82, "optimize": True, "progressive": True}),
+}
+
+# Resized files are named after their source's content, so they never change
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+VARIANT_NAME = re.compile(r"[0-9a-f]{16}-\d+\.(?:webp|jpg)")
+
+# Raw URLs of the files committed to this repository's data/ directory
+# (as the bundled CSV links its photos), read from ``local_dir`` instead
+REPO_DATA_URL = re.compile(
+    r"https://(?:github\.com/hcoco1/dashcoco1/raw|raw\.githubusercontent\.com/hcoco1/dashcoco1)"
+    r"/[^/?#]+/data/(?P<name>[^/?#]+)"
+)
+
+# Seconds between checks for a newer manifest while photos are missing
+REFRESH_INTERVAL = 5
+
+
+def _write_atomic(path, data):
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    tmp_path.write_bytes(data)
+    os.replace(tmp_path, path)
+
+
+class ImageStore:
+    """Resized, compressed copies of the students' photos on local disk.
+
+    ``ingest`` reads each photo once (from ``local_dir`` for local paths and
+    this repository's own raw URLs, from the URL otherwise), writes a WebP and a
+    JPEG copy at every width, named after the photo's content hash, and
+    keeps the URL -> hash mapping in ``manifest.json`` so a restart reuses
+    them. ``load`` reads that manifest and ``start`` resizes the photos
+    missing from it on a background thread. Photos that are missing or
+    cannot be read are shown as the placeholder.
+
+    While photos are missing, the manifest is re-read when it changes, so
+    forked workers pick up the photos resized by the process that forked
+    them. ``version`` changes with the mapping.
+    """
+
+    def __init__(self, directory=DEFAULT_IMAGE_DIR, widths=IMAGE_WIDTHS, local_dir=DEFAULT_CSV_PATH.parent, timeout=10):
+        self.directory = Path(directory)
+        self.widths = tuple(sorted(widths))
+        self.fallback_width = FALLBACK_WIDTH if FALLBACK_WIDTH in self.widths else self.widths[0]
+        self.local_dir = Path(local_dir)
+        self.timeout = timeout
+        self.digests = {}
+        self._digests_version = self._version(self.digests)
+        self.urls = []
+        self._manifest_path = self.directory / "manifest.json"
+        self._manifest_mtime = None
+        self._checked = 0.0
+        self._thread = None
+
+    @staticmethod
+    def _version(digests):
+        return hashlib.sha256(json.dumps(digests, sort_keys=True).encode()).hexdigest()[:16]
+
+    def _set_digests(self, digests):
+        self.digests = digests
+        self._digests_version = self._version(digests)
+
+    # Changes whenever the URL -> hash mapping does
+    @property
+    def version(self):
+        self.refresh()
+        return self._digests_version
+
+    def _read_manifest(self):
+        try:
+            mtime = self._manifest_path.stat().st_mtime_ns
+            digests = json.loads(self._manifest_path.read_text())
+        except (OSError, ValueError):
+            return None, {}
+        return mtime, digests
+
+    @property
+    def pending(self):
+        return [url for url in self.urls if url not in self.digests]
+
+    # Read the photos resized so far, for the given URLs
+    def load(self, urls=()):
+        self.urls = [url for url in dict.fromkeys(urls) if isinstance(url, str) and url]
+        self._manifest_mtime, digests = self._read_manifest()
+        self._set_digests(digests)
+        return self
+
+    # Re-read the manifest if another process or thread has written it since
+    def refresh(self):
+        now = time.monotonic()
+        if now - self._checked < REFRESH_INTERVAL or not self.pending:
+            return
+        self._checked = now
+        try:
+            mtime = self._manifest_path.stat().st_mtime_ns
+        except OSError:
+            return
+        if mtime != self._manifest_mtime:
+            self._manifest_mtime, digests = self._read_manifest()
+            self._set_digests(digests)
+
+    def _variant(self, digest, width, extension):
+        return f"{digest}-{width}.{extension}"
+
+    def _complete(self, digest):
+        return all(
+            (self.directory / self._variant(digest, width, extension)).is_file()
+            for width in self.widths
+            for extension in FORMATS
+        )
+
+    def _read_source(self, url):
+        parsed = urlparse(url)
+        if parsed.scheme in ("", "file"):
+            path = Path(parsed.path)
+            return (path if path.is_absolute() else self.local_dir / path).read_bytes()
+        # This repository's own photos are in the checkout; skip the download
+        match = REPO_DATA_URL.fullmatch(url)
+        local = self.local_dir / match["name"] if match is not None else None
+        if local is not None and local.is_file():
+            return local.read_bytes()
+        response = requests.get(url, timeout=self.timeout)
+        response.raise_for_status()
+        return response.content
+
+    def _write_variants(self, digest, data):
+        image = Image.open(io.BytesIO(data))
+        # Let the JPEG decoder downscale while decoding: much faster for
+        # large photos, and still at least as large as the widest copy
+        image.draft("RGB", (self.widths[-1], self.widths[-1]))
+        image = ImageOps.exif_transpose(image).convert("RGB")
+        for width in self.widths:
+            size = min(width, image.width)
+            resized = image.resize((size, max(1, round(image.height * size / image.width))), Image.LANCZOS)
+            for extension, (image_format, options) in FORMATS.items():
+                buffer = io.BytesIO()
+                resized.save(buffer, image_format, **options)
+                _write_atomic(self.directory / self._variant(digest, width, extension), buffer.getvalue())
+
+    def _ingest_one(self, url):
+        digest = self.digests.get(url)
+        if digest is not None and self._complete(digest):
+            return url, digest
+        try:
+            data = self._read_source(url)
+            digest = hashlib.sha256(data).hexdigest()[:16]
+            if not self._complete(digest):
+                self._write_variants(digest, data)
+        except Exception as error:
+            logger.warning("Showing the placeholder for %s: %s", url, error)
+            return url, None
+        return url, digest
+
+    # Resize every photo not already in the store, ``threads`` at a time
+    def ingest(self, urls, threads=4):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.load(urls)
+        with ThreadPoolExecutor(max_workers=max(1, threads)) as pool:
+            results = list(pool.map(self._ingest_one, self.urls))
+        # Failed photos are left out of the manifest so a restart retries them
+        digests = dict(self.digests)
+        for url, digest in results:
+            if digest is None:
+                digests.pop(url, None)
+            else:
+                digests[url] = digest
+        _write_atomic(self._manifest_path, json.dumps(digests, indent=2, sort_keys=True).encode())
+        self._manifest_mtime = self._manifest_path.stat().st_mtime_ns
+        self._set_digests(digests)
+        return self
+
+    # Resize the photos missing from the manifest on a background thread;
+    # they show the placeholder until it is done
+    def start(self, threads=4):
+        pending = self.pending
+        if not pending:
+            return
+        logger.info("Resizing %d photos in the background", len(pending))
+        # Load Pillow's format plugins in the calling thread: a gunicorn fork
+        # halfway through one of those imports would break it in the worker
+        Image.init()
+        self._thread = threading.Thread(
+            target=self.ingest, args=(self.urls, threads), name="image-ingest", daemon=True
+        )
+        self._thread.start()
+
+    def src(self, url):
+        self.refresh()
+        digest = self.digests.get(url)
+        if digest is None:
+            return PLACEHOLDER_SRC
+        return f"{IMAGE_PATH}/{self._variant(digest, self.fallback_width, 'jpg')}"
+
+    # ``extension`` is "jpg" for the <img>, "webp" for the WebP <source>
+    def srcset(self, url, extension="jpg"):
+        self.refresh()
+        digest = self.digests.get(url)
+        if digest is None:
+            return None
+        return ", ".join(f"{IMAGE_PATH}/{self._variant(digest, width, extension)} {width}w" for width in self.widths)
+
+
+def _store():
+    return current_app.extensions.get("images") if has_app_context() else None
+
+
+# The card's src and srcsets for a photo URL: the resized copies when the
+# app has an image store, the URL itself otherwise
+def image_src(url):
+    store = _store()
+    return url if store is None else store.src(url)
+
+
+def image_srcset(url, extension="jpg"):
+    store = _store()
+    return None if store is None else store.srcset(url, extension)
+
+
+# Install the route serving the resized photos with far-future cache
+# headers. Call it before basic auth is set up so the route is protected.
+def init_app(server, store):
+    server.extensions["images"] = store
+    if store is None:
+        return
+
+    @server.route(f"{IMAGE_PATH}/<name>")
+    def image_view(name):
+        if not VARIANT_NAME.fullmatch(name):
+            abort(404)
+        response = send_from_directory(store.directory, name, max_age=IMMUTABLE_MAX_AGE)
+        response.cache_control.public = True
+        response.cache_control.immutable = True
+        return response
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Resize the students' photos into the image store.")
+    parser.add_argument("--output", type=Path, default=Path(os.getenv("IMAGE_DIR") or DEFAULT_IMAGE_DIR))
+    parser.add_argument("--threads", type=int, default=4)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    load_dotenv()
+    urls = data_source_from_env().load()["Image URL"].unique()
+    store = ImageStore(args.output).ingest(urls, args.threads)
+    print(f"resized {len(store.digests)} of {len(store.urls)} photos into {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,274 @@
+from dash import dash_table, html, dcc
+import dash_bootstrap_components as dbc
+import plotly.io as pio
+
+from src.dataset import subjects
+from src.table_query import PAGE_SIZE
+from src.translations import compile_catalogs, get_columns, get_exam_columns, language_options, translations
+
+# Specify custom favicon and custom title
+INDEX_STRING = """
+<!DOCTYPE html>
+<html>
+    <head>
+        {%metas%}
+        <title>My Dashboard</title>
+        <link rel="icon" href="/assets/favicon.ico" type="image/x-icon">
+        <link rel="icon" href="/assets/favicon.svg" type="image/svg+xml">
+        {%css%}
+    </head>
+    <body>
+        {%app_entry%}
+        <footer>
+            {%config%}
+            {%scripts%}
+            {%renderer%}
+        </footer>
+    </body>
+</html>
+"""
+
+
+# Rendered width of the student's photo: the card is a sixth of the page on
+# large screens and a third on medium ones (hidden below)
+IMAGE_SIZES = "(min-width: 992px) 17vw, 34vw"
+
+# DataTable settings for paging, sorting and filtering on the server
+PAGED_TABLE = {
+    "page_action": "custom",
+    "page_current": 0,
+    "page_size": PAGE_SIZE,
+    "sort_action": "custom",
+    "sort_mode": "multi",
+    "sort_by": [],
+    "filter_action": "custom",
+    "filter_query": "",
+}
+
+
+# Build the Dash app layout for a prepared dataset. The tables start empty
+# and are filled by the callbacks; with paged_tables they page, sort and
+# filter the whole dataset on the server, so the page stays small however
+# many students there are.
+def build_layout(dataset, paged_tables=False, client_side_data=False):
+    df = dataset.df
+    table_options = PAGED_TABLE if paged_tables else {}
+    # In paged mode the student dropdown is searched on the server instead
+    # of listing every student up front
+    students = df["Name"].unique()[:1] if paged_tables else df["Name"].unique()
+    # In client-side data mode the selected student's data and the figure
+    # template are kept in the browser
+    client_stores = [
+        dcc.Store(id="student-store"),
+        dcc.Store(id="figure-template", data=pio.templates[pio.templates.default].to_plotly_json()),
+    ] if client_side_data else []
+    return dbc.Container(
+        [
+            dbc.Row(
+                [
+                    dbc.Col(
+                        html.H3(id='dashboard-title', children="Student Performance Dashboard"),
+                        width={"size": 6, "offset": 3},
+                        className="text-center mt-4"
+                    )
+                ]
+            ),
+            dbc.Row(
+                [
+                    dbc.Col(
+                        [
+                            html.H5("Language"),
+                            dcc.Dropdown(
+                                id="language-dropdown",
+                                options=language_options(),
+                                value="en",
+                                clearable=False,
+                                style={"width": "100%"},
+                            ),
+                        ],
+                        xs=12,
+                        sm=4,
+                        md=4,
+                        lg=2,
+                        className="mt-4",
+                    ),
+                    dbc.Col(
+                        [
+                            html.H5(id="student-label"),
+                            dcc.Dropdown(
+                                id="student-dropdown",
+                                options=[
+                                    {"label": name, "value": name}
+                                    for name in students
+                                ],
+                                value=df["Name"].unique()[0],
+                                clearable=False,
+                                style={"width": "100%"},
+                            ),
+                        ],
+                        xs=12,
+                        sm=4,
+                        md=4,
+                        lg=2,
+                        className="mt-4",
+                    ),
+                    dbc.Col(
+                        [
+                            html.H5(id="grade-label"),
+                            dcc.Dropdown(
+                                id="year-dropdown",
+                                options=[
+                                    {
+                                        "label": translations["en"]["grades"][year],
+                                        "value": year,
+                                    }
+                                    for year in df["Year"].unique()
+                                ],
+                                value=df["Year"].unique()[0],
+                                clearable=False,
+                                style={"width": "100%"},
+                            ),
+                        ],
+                        xs=12,
+                        sm=4,
+                        md=4,
+                        lg=2,
+                        className="mt-4",
+                    ),
+                    dbc.Col(
+                        dbc.Card(
+                            dbc.CardBody(
+                                html.Div(
+                                    [
+                                        # Browsers that decode WebP take the <source>,
+                                        # the others the JPEG srcset of the <img>
+                                        html.Picture(
+                                            [
+                                                html.Source(
+                                                    id="student-image-webp",
+                                                    type="image/webp",
+                                                    sizes=IMAGE_SIZES,
+                                                ),
+                                                html.Img(
+                                                    id="student-image",
+                                                    sizes=IMAGE_SIZES,
+                                                    style={
+                                                        "width": "100%",
+                                                        "height": "auto",
+                                                        "display": "block",
+                                                        "object-fit": "cover",  # Ensure the image is square
+                                                    },
+                                                ),
+                                            ],
+                                            className="mt-4 d-none d-md-block"
+                                        ),
+                                        html.H4(
+                                            [html.Span(id="average-label"), ": ", html.Span(id="average-value")],
+                                            id="average-grade",
+                                            className="card-title text-center mt-3",
+                                        ),
+                                    ],
+                                    style={
+                                        "display": "flex",
+                                        "flexDirection": "column",
+                                        "alignItems": "center",
+                                    },
+                                )
+                            ),
+                            style={
+                                "width": "100%",
+                                "height": "100%",
+                                "display": "flex",
+                                "alignItems": "center",
+                                "justifyContent": "center",
+                            },
+                        ),
+                        xs=12,
+                        sm=12,
+                        md=4,
+                        lg=2,
+                        className="mt-4 mb-4"
+                    ),
+                ],
+                className="justify-content-center align-items-center"
+            ),
+            dbc.Row(
+                [
+                    dbc.Col(
+                        dash_table.DataTable(
+                            id="summary-table",
+                            columns=get_columns('en'),  # Initialize with default language
+                            style_table={"overflowX": "auto"},
+                            style_header={
+                                "backgroundColor": "rgb(230, 230, 230)",
+                                "fontWeight": "bold",
+                            },
+                            style_cell={"textAlign": "center"},
+                            **table_options,
+                        ),
+                        width=12,
+                        className="mb-4 mt-4",
+                    )
+                ]
+            ),
+            dbc.Row(
+                [
+                    dbc.Col(dcc.Graph(id="subject-performance-chart"), width=12),
+                ],
+                className="mb-4"
+            ),
+            dbc.Row(
+                [
+                    dbc.Col(
+                        [
+                            html.H5(id='subject-label'),
+                            dcc.Dropdown(
+                                id="subject-dropdown",
+                                options=[
+                                    {"label": subject, "value": subject} for subject in subjects
+                                ],
+                                value=subjects[0],
+                                clearable=False,
+                                style={"width": "100%"}
+                            ),
+                        ],
+                        xs=12,
+                        sm=6,
+                        md=4,
+                        lg=2,
+                        className="mb-4"
+                    )
+                ]
+            ),
+            dbc.Row(
+                [
+                    dbc.Col(
+                        dash_table.DataTable(
+                            id="exam-table",
+                            columns=get_exam_columns('en', subjects[0]),  # Initialize with default language and first subject
+                            style_table={"overflowX": "auto"},
+                            style_header={
+                                "backgroundColor": "rgb(230, 230, 230)",
+                                "fontWeight": "bold",
+                            },
+                            style_cell={"textAlign": "center"},
+                            **table_options,
+                        ),
+                        width=12,
+                        className="mb-4"
+                    )
+                ]
+            ),
+            dbc.Row(
+                [
+                    dbc.Col(dcc.Graph(id="performance-over-time"), width=12)
+                ]
+            ),
+            # Every language's labels, columns and year options, so
+            # switching language needs no server round trip
+            dcc.Store(id="i18n-catalog", data=compile_catalogs()),
+        ]
+        + client_stores,
+        fluid=True,
+        style={"max-width": "1200px"},
+    )
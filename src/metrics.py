@@ -0,0 +1,306 @@
+import contextvars
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+from flask import Response, current_app, g, has_app_context, has_request_context
+
+# Prometheus scrape route on the Flask server
+METRICS_PATH = "/metrics"
+
+# Server-Timing entries, in header order, with their devtools descriptions
+SERVER_TIMING_PHASES = {
+    "lookup": "Row index and tensor lookups",
+    "dataframe": "Table rows (to_dict records)",
+    "figure": "Figure construction",
+    "serialize": "JSON encoding",
+    "other": "Other callback work",
+}
+
+# Histogram buckets: seconds for latencies, bytes for payloads
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576)
+
+# The CallbackTimer of the callback running in this thread, if any
+_current_timer = contextvars.ContextVar("callback_timer", default=None)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels) + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+    """Prometheus histogram, one series per label combination."""
+
+    def __init__(self, name, documentation, buckets, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(buckets) + (float("inf"),)
+        self.labelnames = tuple(labelnames)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(labels[name] for name in self.labelnames)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+                    break
+            series[1] += value
+            series[2] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = sorted(self._series.items())
+            series = [(key, list(counts), total, count) for key, (counts, total, count) in series]
+        for key, counts, total, count in series:
+            labels = list(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                bucket_labels = _format_labels(labels + [("le", _format_value(float(bound)))])
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(labels)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(labels)} {count}")
+        return lines
+
+
+class CallbackTimer:
+    """Wall and CPU time of one callback, split into exclusive phases.
+
+    Time is charged to the innermost open phase, so a lookup inside a figure
+    build counts as lookup and not twice. Time outside any phase is "other".
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.wall = defaultdict(float)
+        self.cpu = defaultdict(float)
+        self._stack = ["other"]
+        self._wall_mark = time.perf_counter()
+        self._cpu_mark = time.thread_time()
+
+    def _charge(self, phase=None):
+        phase = phase or self._stack[-1]
+        wall, cpu = time.perf_counter(), time.thread_time()
+        self.wall[phase] += wall - self._wall_mark
+        self.cpu[phase] += cpu - self._cpu_mark
+        self._wall_mark, self._cpu_mark = wall, cpu
+
+    def push(self, phase):
+        self._charge()
+        self._stack.append(phase)
+
+    def pop(self):
+        self._charge()
+        self._stack.pop()
+
+    # Charge the time since the last mark to ``phase`` (default: the open one)
+    def stop(self, phase=None):
+        self._charge(phase)
+
+    # Server-Timing header value, durations in milliseconds
+    def server_timing(self):
+        entries = [
+            f'{phase};dur={self.wall[phase] * 1000:.2f};desc="{description}"'
+            for phase, description in SERVER_TIMING_PHASES.items()
+            if phase in self.wall
+        ]
+        entries.append(f'total;dur={sum(self.wall.values()) * 1000:.2f};desc="{self.name}"')
+        return ", ".join(entries)
+
+
+# Charge the time spent in the block (or decorated function) to a phase of
+# the running callback; a no-op outside a timed callback
+@contextmanager
+def timed_phase(phase):
+    timer = _current_timer.get()
+    if timer is None:
+        yield
+        return
+    timer.push(phase)
+    try:
+        yield
+    finally:
+        timer.pop()
+
+
+class Metrics:
+    """Per-process metrics rendered in the Prometheus text format.
+
+    Callback timings and response sizes are histograms. Values set once at
+    startup are gauges, and ``collectors`` are called at scrape time for
+    the values that live elsewhere (cache counters, warmup progress); they
+    return ``(name, type, help, value, labels)`` samples.
+    """
+
+    def __init__(self):
+        self.callback_seconds = Histogram(
+            "dashboard_callback_seconds",
+            "Wall time of Dash callbacks by phase (phase=total for the whole callback).",
+            LATENCY_BUCKETS,
+            ("callback", "phase"),
+        )
+        self.callback_cpu_seconds = Histogram(
+            "dashboard_callback_cpu_seconds",
+            "CPU time of Dash callbacks by phase (phase=total for the whole callback).",
+            LATENCY_BUCKETS,
+            ("callback", "phase"),
+        )
+        self.response_bytes = Histogram(
+            "dashboard_callback_response_bytes",
+            "Size of Dash callback responses.",
+            SIZE_BUCKETS,
+            ("callback",),
+        )
+        self.gauges = {}
+        self.collectors = []
+
+    def set_gauge(self, name, documentation, value, **labels):
+        _, _, samples = self.gauges.setdefault(name, ("gauge", documentation, {}))
+        samples[tuple(sorted(labels.items()))] = value
+
+    def observe_callback(self, timer):
+        for phase in timer.wall:
+            self.callback_seconds.observe(timer.wall[phase], callback=timer.name, phase=phase)
+            self.callback_cpu_seconds.observe(timer.cpu[phase], callback=timer.name, phase=phase)
+        self.callback_seconds.observe(sum(timer.wall.values()), callback=timer.name, phase="total")
+        self.callback_cpu_seconds.observe(sum(timer.cpu.values()), callback=timer.name, phase="total")
+
+    def render(self):
+        lines = []
+        for histogram in (self.callback_seconds, self.callback_cpu_seconds, self.response_bytes):
+            lines.extend(histogram.render())
+
+        metrics = {name: (kind, documentation, dict(samples)) for name, (kind, documentation, samples) in self.gauges.items()}
+        for collect in self.collectors:
+            for name, kind, documentation, value, labels in collect():
+                _, _, samples = metrics.setdefault(name, (kind, documentation, {}))
+                samples[tuple(sorted(labels.items()))] = value
+        for name, (kind, documentation, samples) in sorted(metrics.items()):
+            lines.append(f"# HELP {name} {documentation}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in sorted(samples.items()):
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+# Time a callback when the app has metrics or Server-Timing enabled (a
+# no-op otherwise). Inside a request the timings are recorded after the
+# response is serialized (see init_app) so that Dash's own serialization
+# counts as the "serialize" phase.
+@contextmanager
+def time_callback(name):
+    extensions = current_app.extensions if has_app_context() else {}
+    metrics = extensions.get("metrics")
+    if metrics is None and not extensions.get("server_timing"):
+        yield
+        return
+    timer = CallbackTimer(name)
+    token = _current_timer.set(timer)
+    try:
+        yield
+    finally:
+        _current_timer.reset(token)
+        timer.stop()
+        if has_request_context():
+            g.callback_timer = timer
+        elif metrics is not None:
+            metrics.observe_callback(timer)
+
+
+# Cache stats() keys that only ever grow
+CACHE_COUNTERS = {"hits", "misses", "shared_hits", "coalesced", "evictions"}
+
+
+# Samples read from the app's caches, warmup and dataset at scrape time
+def _app_collector(server, dataset):
+    def collect():
+        samples = [
+            ("dashboard_dataset_rows", "gauge", "Rows in the prepared tables.", len(dataset.df), {"table": "exams"}),
+            ("dashboard_dataset_rows", "gauge", "Rows in the prepared tables.", len(dataset.summary_df), {"table": "summary"}),
+            ("dashboard_dataset_students", "gauge", "Students in the dataset.", len(dataset.grades.students), {}),
+        ]
+        for cache_name in ("figure_cache", "shared_cache"):
+            cache = server.extensions.get(cache_name)
+            if cache is None:
+                continue
+            stats = cache.stats()
+            lookups = stats["hits"] + stats["misses"]
+            samples.append((
+                f"dashboard_{cache_name}_hit_ratio",
+                "gauge",
+                "Share of lookups answered from the cache since startup.",
+                stats["hits"] / lookups if lookups else 0.0,
+                {},
+            ))
+            for stat, value in stats.items():
+                if not isinstance(value, (int, float)):
+                    continue
+                if stat in CACHE_COUNTERS:
+                    samples.append((f"dashboard_{cache_name}_{stat}_total", "counter", f"{cache_name} {stat}.", value, {}))
+                else:
+                    samples.append((f"dashboard_{cache_name}_{stat}", "gauge", f"{cache_name} {stat}.", value, {}))
+        warmup = server.extensions.get("warmup")
+        if warmup is not None:
+            stats = warmup.stats()
+            samples.append(("dashboard_warmup_figures", "gauge", "Figures built by the startup warmup.", stats["done"], {"state": "done"}))
+            samples.append(("dashboard_warmup_figures", "gauge", "Figures built by the startup warmup.", stats["total"], {"state": "total"}))
+            samples.append(("dashboard_warmup_ready", "gauge", "1 once the startup warmup has finished.", int(warmup.ready), {}))
+        return samples
+
+    return collect
+
+
+# Install the /metrics route (with ``metrics``) and the hook that records
+# callback timings and response sizes and adds the Server-Timing header
+# (with ``server_timing``). Call it before basic auth is set up so the
+# route is protected, and before any hook that rewrites the response body
+# (encoded_json.init_app): Flask runs after_request hooks in reverse order,
+# so this one then sees the final body.
+def init_app(server, metrics=None, dataset=None, server_timing=False):
+    server.extensions["metrics"] = metrics
+    server.extensions["server_timing"] = server_timing
+    if metrics is None and not server_timing:
+        return
+
+    @server.after_request
+    def record_callback(response):
+        timer = g.pop("callback_timer", None)
+        if timer is None:
+            return response
+        # Everything between the callback returning and now is Dash
+        # serializing its result (plus the response splice)
+        timer.stop("serialize")
+        if metrics is not None:
+            metrics.observe_callback(timer)
+            metrics.response_bytes.observe(response.calculate_content_length() or 0, callback=timer.name)
+        if server_timing:
+            response.headers["Server-Timing"] = timer.server_timing()
+        return response
+
+    if metrics is None:
+        return
+    metrics.collectors.append(_app_collector(server, dataset))
+
+    @server.route(METRICS_PATH)
+    def metrics_view():
+        return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
@@ -0,0 +1,195 @@
+import cProfile
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from functools import wraps
+from pathlib import Path
+
+from flask import g, request
+from itsdangerous import BadSignature, URLSafeTimedSerializer
+
+from src.encoded_json import UPDATE_COMPONENT_PATH
+
+# Profiles are written next to the data unless PROFILE_DIR says otherwise
+DEFAULT_PROFILE_DIR = Path(__file__).resolve().parent.parent / "data" / ".profiles"
+
+# Query parameter carrying a signed profiling token, and the cookie that
+# keeps it for the callback requests of the page it was opened with
+PROFILE_PARAM = "profile"
+PROFILE_COOKIE = "dash_profile"
+
+# Routes serving the dashboard page, where the token arrives in the URL
+INDEX_RULES = ("/", "/<path:path>")
+
+# Seconds a signed token stays valid
+TOKEN_MAX_AGE = 3600
+
+_TOKEN_SALT = "dashboard-profile"
+
+
+def _serializer(secret_key):
+    return URLSafeTimedSerializer(secret_key, salt=_TOKEN_SALT)
+
+
+# Token that turns profiling on for one browser in the "signed" mode:
+# open the dashboard with ?profile=<token>
+def profile_token(secret_key):
+    return _serializer(secret_key).dumps("profile")
+
+
+def _safe_name(value, limit=80):
+    return re.sub(r"[^A-Za-z0-9_.-]+", "_", value).strip("_.")[:limit] or "callback"
+
+
+class StackSampler:
+    """Samples the call stack of one thread at a fixed interval.
+
+    ``collapsed`` returns the samples in the folded format read by
+    flamegraph.pl and speedscope: one ``frame;frame;frame count`` line per
+    distinct stack, outermost frame first.
+    """
+
+    def __init__(self, thread_id, interval=0.001):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if stack:
+                self.samples[";".join(reversed(stack))] += 1
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def collapsed(self):
+        return "".join(f"{stack} {count}\n" for stack, count in self.samples.most_common())
+
+
+class RequestProfiler:
+    """Profiles flagged ``_dash-update-component`` requests.
+
+    In the "always" mode every callback request is profiled; in the
+    "signed" mode only those from a browser that opened the dashboard with
+    a valid ``?profile=<token>`` (see ``profile_token``) or that pass the
+    token themselves. Each profiled request writes a cProfile ``.pstats``
+    file and a ``.collapsed`` file of sampled stacks to ``directory``,
+    named after the time, the callback's output id and the process.
+    """
+
+    MODES = ("always", "signed")
+
+    def __init__(self, mode, directory=DEFAULT_PROFILE_DIR, secret_key=None, interval=0.001):
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown profiler mode {mode!r}; expected one of {', '.join(self.MODES)}")
+        if mode == "signed" and not secret_key:
+            raise ValueError("The signed profiler mode needs a SECRET_KEY to check tokens with.")
+        self.mode = mode
+        self.directory = Path(directory)
+        self.interval = interval
+        self._serializer = _serializer(secret_key) if secret_key else None
+
+    def valid_token(self, token):
+        if not token or self._serializer is None:
+            return False
+        try:
+            self._serializer.loads(token, max_age=TOKEN_MAX_AGE)
+        except BadSignature:
+            return False
+        return True
+
+    def wanted(self):
+        if self.mode == "always":
+            return True
+        return self.valid_token(request.args.get(PROFILE_PARAM) or request.cookies.get(PROFILE_COOKIE))
+
+    def start(self):
+        profile = cProfile.Profile()
+        sampler = StackSampler(threading.get_ident(), self.interval)
+        sampler.start()
+        profile.enable()
+        return profile, sampler
+
+    def finish(self, session, callback_id):
+        profile, sampler = session
+        profile.disable()
+        sampler.stop()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        stem = f"{time.strftime('%Y%m%d-%H%M%S')}-{int(time.time() * 1000) % 1000:03d}-{_safe_name(callback_id)}-{os.getpid()}"
+        profile.dump_stats(self.directory / f"{stem}.pstats")
+        (self.directory / f"{stem}.collapsed").write_text(sampler.collapsed())
+        return self.directory / stem
+
+
+# Profile the callback requests the profiler wants and keep a valid token
+# from the page URL in a cookie. The views are wrapped rather than hooked in
+# before_request, which would run ahead of basic auth: call it before basic
+# auth is set up so only authorized requests are profiled or get the cookie.
+def init_app(server, profiler):
+    # Start profiling a callback request the profiler wants
+    def profiled(view):
+        @wraps(view)
+        def profiled_view(*args, **kwargs):
+            if profiler.wanted():
+                g.profile_session = profiler.start()
+            return view(*args, **kwargs)
+
+        return profiled_view
+
+    # Remember a valid token from the page URL for its callbacks
+    def remember_token(view):
+        @wraps(view)
+        def token_view(*args, **kwargs):
+            token = request.args.get(PROFILE_PARAM)
+            if token is not None and profiler.valid_token(token):
+                g.profile_cookie = token
+            return view(*args, **kwargs)
+
+        return token_view
+
+    server.view_functions[UPDATE_COMPONENT_PATH] = profiled(server.view_functions[UPDATE_COMPONENT_PATH])
+    for rule in list(server.url_map.iter_rules()):
+        if rule.rule in INDEX_RULES:
+            server.view_functions[rule.endpoint] = remember_token(server.view_functions[rule.endpoint])
+
+    @server.after_request
+    def set_profile_cookie(response):
+        token = g.pop("profile_cookie", None)
+        if token is not None:
+            response.set_cookie(
+                PROFILE_COOKIE, token, max_age=TOKEN_MAX_AGE, httponly=True, samesite="Strict"
+            )
+        return response
+
+    # Runs after every after_request hook, so the profile covers the whole
+    # response, splice included (but not basic auth, which runs first)
+    @server.teardown_request
+    def finish_profile(error=None):
+        session = g.pop("profile_session", None)
+        if session is None:
+            return
+        payload = request.get_json(silent=True) or {}
+        profiler.finish(session, str(payload.get("output", "callback")))
+
+
+# Print a profiling token for the SECRET_KEY in the environment / .env
+if __name__ == "__main__":
+    from src.config import Config
+
+    config = Config.from_env()
+    print(profile_token(config.secret_key))
@@ -0,0 +1,246 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+# Shared caches live next to the snapshots unless SHARED_CACHE_PATH says otherwise
+DEFAULT_CACHE_DIR = Path(__file__).resolve().parent.parent / "data" / ".cache"
+
+
+# Stable key for a cached value: the same parts give the same key in every
+# worker process (unlike hash(), which is salted per process)
+def cache_key(*parts):
+    return hashlib.sha256(repr(parts).encode()).hexdigest()
+
+
+class FileSystemCache:
+    """Byte values stored as one file each under ``directory``.
+
+    Every worker process that points at the same directory sees the others'
+    entries. Entries older than ``ttl`` seconds are misses; when the files
+    add up to more than ``max_bytes`` the oldest are deleted. The total is
+    re-checked every ``prune_interval`` writes rather than on each one.
+    """
+
+    def __init__(self, directory=DEFAULT_CACHE_DIR / "figures", ttl=3600, max_bytes=256 * 1024 * 1024, prune_interval=64):
+        self.directory = Path(directory)
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.prune_interval = prune_interval
+        self.hits = 0
+        self.misses = 0
+        self._writes = 0
+        self._lock = threading.Lock()
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, key):
+        return self.directory / key[:2] / key
+
+    def _expired(self, mtime, now):
+        return self.ttl is not None and mtime + self.ttl < now
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, "rb") as handle:
+                if self._expired(os.fstat(handle.fileno()).st_mtime, time.time()):
+                    data = None
+                else:
+                    data = handle.read()
+        except FileNotFoundError:
+            data = None
+        with self._lock:
+            if data is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return data
+
+    def set(self, key, data):
+        if len(data) > self.max_bytes:
+            return
+        path = self._path(key)
+        path.parent.mkdir(exist_ok=True)
+        # Write to a temporary file first so other workers never read a partial entry
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp_path, "wb") as handle:
+            handle.write(data)
+        os.replace(tmp_path, path)
+        with self._lock:
+            self._writes += 1
+            prune = self._writes % self.prune_interval == 0
+        if prune:
+            self.prune()
+
+    def _entries(self):
+        entries = []
+        for path in self.directory.glob("*/*"):
+            if path.name.endswith(".tmp"):
+                continue
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    # Delete expired entries, then the oldest until the total fits max_bytes
+    def prune(self):
+        now = time.time()
+        entries = []
+        for mtime, size, path in self._entries():
+            if self._expired(mtime, now):
+                path.unlink(missing_ok=True)
+            else:
+                entries.append((mtime, size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+
+    def clear(self):
+        for _, _, path in self._entries():
+            path.unlink(missing_ok=True)
+
+    def stats(self):
+        entries = self._entries()
+        with self._lock:
+            return {
+                "backend": "filesystem",
+                "entries": len(entries),
+                "bytes": sum(size for _, size, _ in entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "max_bytes": self.max_bytes,
+                "ttl": self.ttl,
+            }
+
+
+class SQLiteCache:
+    """Byte values stored in one SQLite database shared by every worker.
+
+    The database runs in WAL mode so readers do not block the writer; put it
+    on a tmpfs such as ``/dev/shm`` to keep it in memory. Entries older than
+    ``ttl`` seconds are misses, and each write deletes the oldest entries
+    until the total fits ``max_bytes``. Connections are opened per thread and
+    per process, so the cache can be created before gunicorn forks.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_DIR / "figures.sqlite", ttl=3600, max_bytes=256 * 1024 * 1024):
+        self.path = Path(path)
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "key TEXT PRIMARY KEY, value BLOB NOT NULL, size INTEGER NOT NULL, created REAL NOT NULL)"
+            )
+            connection.execute("CREATE INDEX IF NOT EXISTS entries_created ON entries (created)")
+
+    def _connect(self):
+        if getattr(self._local, "pid", None) != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return self._local.connection
+
+    def _oldest_valid(self):
+        return 0 if self.ttl is None else time.time() - self.ttl
+
+    def get(self, key):
+        row = self._connect().execute(
+            "SELECT value FROM entries WHERE key = ? AND created >= ?", (key, self._oldest_valid())
+        ).fetchone()
+        with self._lock:
+            if row is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return None if row is None else bytes(row[0])
+
+    def set(self, key, data):
+        if len(data) > self.max_bytes:
+            return
+        connection = self._connect()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            connection.execute(
+                "INSERT OR REPLACE INTO entries (key, value, size, created) VALUES (?, ?, ?, ?)",
+                (key, sqlite3.Binary(data), len(data), time.time()),
+            )
+            self._prune(connection)
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+
+    def _prune(self, connection):
+        connection.execute("DELETE FROM entries WHERE created < ?", (self._oldest_valid(),))
+        total = connection.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        excess = total - self.max_bytes
+        doomed = []
+        for key, size in connection.execute("SELECT key, size FROM entries ORDER BY created"):
+            doomed.append((key,))
+            excess -= size
+            if excess <= 0:
+                break
+        connection.executemany("DELETE FROM entries WHERE key = ?", doomed)
+
+    def prune(self):
+        connection = self._connect()
+        connection.execute("BEGIN IMMEDIATE")
+        self._prune(connection)
+        connection.execute("COMMIT")
+
+    def clear(self):
+        self._connect().execute("DELETE FROM entries")
+
+    def stats(self):
+        entries, total = self._connect().execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries"
+        ).fetchone()
+        with self._lock:
+            return {
+                "backend": "sqlite",
+                "entries": entries,
+                "bytes": total,
+                "hits": self.hits,
+                "misses": self.misses,
+                "max_bytes": self.max_bytes,
+                "ttl": self.ttl,
+            }
+
+
+SHARED_CACHE_BACKENDS = {
+    "filesystem": FileSystemCache,
+    "sqlite": SQLiteCache,
+}
+
+
+# Open the shared cache named by ``backend`` ("filesystem" or "sqlite"), or
+# return None when it is empty
+def open_shared_cache(backend, path=None, ttl=3600, max_bytes=256 * 1024 * 1024):
+    if not backend:
+        return None
+    try:
+        cache_class = SHARED_CACHE_BACKENDS[backend]
+    except KeyError:
+        raise ValueError(
+            f"Unknown shared cache backend {backend!r}; expected one of {', '.join(SHARED_CACHE_BACKENDS)}"
+        ) from None
+    if path is None:
+        return cache_class(ttl=ttl, max_bytes=max_bytes)
+    return cache_class(path, ttl=ttl, max_bytes=max_bytes)
@@ -0,0 +1,94 @@
+import copy
+import os
+import threading
+import weakref
+
+
+# Every live SingleFlight, for the fork hook below (held weakly, so
+# dropping one frees it)
+_flights = weakref.WeakSet()
+
+
+def _after_fork_in_child():
+    for instance in list(_flights):
+        instance._after_fork()
+
+
+os.register_at_fork(after_in_child=_after_fork_in_child)
+
+
+# The exception a waiting caller raises for the leader's ``error``: a copy,
+# since raising the same object in several threads at once mixes their
+# tracebacks into it
+def _waiter_error(error):
+    try:
+        return copy.copy(error)
+    except Exception:
+        return RuntimeError(f"coalesced call failed: {error!r}")
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Runs at most one call per key at a time within the process.
+
+    A caller that arrives while a call with the same key is in flight waits
+    for it and gets its result (or a copy of its exception, chained to the
+    original) instead of running the function again. ``calls`` counts the
+    functions actually run and ``coalesced`` the callers that shared
+    another's result.
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.coalesced = 0
+        self._inflight = {}
+        self._lock = threading.Lock()
+        _flights.add(self)
+
+    # Calls in flight in the parent never finish in a forked child
+    def _after_fork(self):
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, func):
+        with self._lock:
+            call = self._inflight.get(key)
+            leader = call is None
+            if leader:
+                call = self._inflight[key] = _Call()
+                self.calls += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise _waiter_error(call.error) from call.error
+            return call.result
+
+        try:
+            call.result = func()
+        except BaseException as error:
+            call.error = error
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[key]
+            call.done.set()
+        return call.result
+
+    def stats(self):
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "coalesced": self.coalesced,
+                "in_flight": len(self._inflight),
+            }
@@ -0,0 +1,103 @@
+"""Generate synthetic grades datasets in the CSV's schema.
+
+    python -m src.synthetic --students 100000 --csv data/synthetic.csv --snapshot data/synthetic.npz
+
+The same arguments and seed always give the same dataset. Load the result
+with DATA_PATH (a .csv or a .npz snapshot).
+"""
+import argparse
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.data_source import write_snapshot
+from src.dataset import all_years, subjects
+
+GRADE_COLUMNS = [f"{subject} Exam {n}" for subject in subjects for n in (1, 2, 3)]
+
+# The two portraits in data/, cycled through as the students' images
+IMAGE_URLS = [
+    "https://github.com/hcoco1/dashcoco1/raw/53ac6b1de9b01e57a61e707a713e1ad84a67115a/data/john_doe.jpg",
+    "https://github.com/hcoco1/dashcoco1/raw/53ac6b1de9b01e57a61e707a713e1ad84a67115a/data/jane_doe.jpg",
+]
+
+FIRST_NAMES = [
+    "Ana", "Luis", "Maria", "Jose", "Carmen", "Pedro", "Sofia", "Diego", "Valentina", "Andres",
+    "Camila", "Jorge", "Isabella", "Carlos", "Lucia", "Miguel", "Elena", "Rafael", "Gabriela", "Daniel",
+    "Emma", "Liam", "Olivia", "Noah", "Ava", "Ethan", "Mia", "Lucas", "Chloe", "Mateo",
+]
+LAST_NAMES = [
+    "Garcia", "Rodriguez", "Martinez", "Hernandez", "Lopez", "Gonzalez", "Perez", "Sanchez", "Ramirez", "Torres",
+    "Flores", "Rivera", "Gomez", "Diaz", "Cruz", "Morales", "Reyes", "Gutierrez", "Ortiz", "Castillo",
+    "Smith", "Johnson", "Brown", "Davis", "Miller", "Wilson", "Moore", "Taylor", "Anderson", "Thomas",
+]
+
+
+# Unique, deterministic names: every first/last combination, then the
+# same combinations again with a number
+def student_names(n_students):
+    combinations = len(FIRST_NAMES) * len(LAST_NAMES)
+    names = []
+    for i in range(n_students):
+        first = FIRST_NAMES[i % len(FIRST_NAMES)]
+        last = LAST_NAMES[(i // len(FIRST_NAMES)) % len(LAST_NAMES)]
+        round_ = i // combinations
+        names.append(f"{first} {last}" if round_ == 0 else f"{first} {last} {round_ + 1}")
+    return names
+
+
+# Build a dataset in the CSV's schema. Each student has an overall ability
+# (centred on 12 out of 20), a strength or weakness per subject and a
+# drift from year to year; each exam adds its own noise. Grades are
+# rounded and clipped to 0-20. About missing_fraction of the (student,
+# year) rows are dropped, keeping at least one year per student.
+def generate_grades(n_students, missing_fraction=0.25, seed=0):
+    rng = np.random.default_rng(seed)
+    n_years, n_subjects = len(all_years), len(subjects)
+
+    ability = rng.normal(12.0, 2.5, size=(n_students, 1, 1, 1))
+    subject_offset = rng.normal(0.0, 1.5, size=(n_students, 1, n_subjects, 1))
+    year_drift = np.cumsum(rng.normal(0.0, 0.6, size=(n_students, n_years, 1, 1)), axis=1)
+    exam_noise = rng.normal(0.0, 2.0, size=(n_students, n_years, n_subjects, 3))
+    grades = np.clip(np.rint(ability + subject_offset + year_drift + exam_noise), 0, 20).astype(np.int64)
+
+    keep = rng.random((n_students, n_years)) >= missing_fraction
+    no_years = ~keep.any(axis=1)
+    keep[no_years, rng.integers(0, n_years, size=int(no_years.sum()))] = True
+    student_index, year_index = np.nonzero(keep)
+
+    names = np.array(student_names(n_students), dtype=object)
+    images = np.array(IMAGE_URLS, dtype=object)
+    frame = pd.DataFrame({
+        "Name": names[student_index],
+        "Image URL": images[student_index % len(images)],
+        "Year": np.array(all_years, dtype=object)[year_index],
+    })
+    exams = grades[student_index, year_index].reshape(len(student_index), n_subjects * 3)
+    return pd.concat([frame, pd.DataFrame(exams, columns=GRADE_COLUMNS)], axis=1)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--students", type=int, default=1000)
+    parser.add_argument("--missing-fraction", type=float, default=0.25)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--csv", type=Path, help="write the dataset as CSV to this path")
+    parser.add_argument("--snapshot", type=Path, help="write the dataset as a binary .npz snapshot to this path")
+    args = parser.parse_args(argv)
+    if args.csv is None and args.snapshot is None:
+        parser.error("pass --csv and/or --snapshot")
+
+    df = generate_grades(args.students, args.missing_fraction, args.seed)
+    if args.csv is not None:
+        args.csv.parent.mkdir(parents=True, exist_ok=True)
+        df.to_csv(args.csv, index=False)
+        print(f"wrote {len(df)} rows for {args.students} students to {args.csv}")
+    if args.snapshot is not None:
+        write_snapshot(df, args.snapshot)
+        print(f"wrote {len(df)} rows for {args.students} students to {args.snapshot}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+import re
+
+import numpy as np
+
+# Rows per page of the tables in paged mode
+PAGE_SIZE = 13
+
+# DataTable filter operators, normalised to one spelling each. The "i"
+# forms compare text case-insensitively (see CASE_INSENSITIVE).
+FILTER_OPERATORS = {
+    "=": "eq", "eq": "eq", "s=": "eq", "i=": "ieq",
+    "!=": "ne", "ne": "ne", "s!=": "ne", "i!=": "ine",
+    "<": "lt", "lt": "lt", "s<": "lt",
+    "<=": "le", "le": "le", "s<=": "le",
+    ">": "gt", "gt": "gt", "s>": "gt",
+    ">=": "ge", "ge": "ge", "s>=": "ge",
+    "contains": "contains", "scontains": "contains", "icontains": "icontains",
+}
+
+# Case-insensitive operators and the operator they otherwise act as
+CASE_INSENSITIVE = {"ieq": "eq", "ine": "ne", "icontains": "contains"}
+
+_FILTER_PART = re.compile(
+    r"^\s*\{(?P<column>[^}]+)\}\s*(?P<operator>[^\s\"'`]+)\s*(?P<value>.*?)\s*$"
+)
+
+
+def _unquote(value):
+    if len(value) >= 2 and value[0] == value[-1] and value[0] in "\"'`":
+        return value[1:-1].replace("\\" + value[0], value[0])
+    return value
+
+
+# Parse a DataTable filter_query ("{Name} s= Jane && {Art} > 12") into
+# (column, operator, value) triples. Parts that cannot be parsed are skipped.
+def parse_filter_query(filter_query):
+    conditions = []
+    for part in (filter_query or "").split(" && "):
+        match = _FILTER_PART.match(part)
+        if not match:
+            continue
+        operator = FILTER_OPERATORS.get(match["operator"].lower())
+        if operator is None:
+            continue
+        conditions.append((match["column"], operator, _unquote(match["value"])))
+    return conditions
+
+
+def _compare(values, operator, value):
+    if operator == "eq":
+        return values == value
+    if operator == "ne":
+        return values != value
+    if operator == "lt":
+        return values < value
+    if operator == "le":
+        return values <= value
+    if operator == "gt":
+        return values > value
+    return values >= value
+
+
+class TableQuery:
+    """Server-side filtering, sorting and paging over a prepared dataset.
+
+    Rows are positions in ``dataset.df`` / ``dataset.summary_df``. Filters on
+    Name and Year go through the dataset's (student, year) index; the rest
+    compare whole numpy columns. Only the requested page is turned into
+    records.
+    """
+
+    def __init__(self, dataset, frame):
+        self.dataset = dataset
+        self.frame = frame
+        self.student_codes = frame["Name"].cat.codes.to_numpy()
+        self.year_codes = frame["Year"].cat.codes.to_numpy()
+
+    # Codes of the years matching a filter value, typed as shown
+    # (translated) or as stored: equal to it, or containing it
+    def _year_codes(self, value, year_labels, contains=False, fold=False):
+        years = self.dataset.grades.years
+        names = [(label, year) for label, year in year_labels.items()] + [(year, year) for year in years]
+        if fold:
+            value = value.lower()
+        codes = set()
+        for name, year in names:
+            name = name.lower() if fold else name
+            if (value in name if contains else value == name) and year in years:
+                codes.add(self.dataset.grades.year_code(year))
+        return sorted(codes)
+
+    def _column(self, column, positions):
+        if column == "Name":
+            return self.frame["Name"].cat.categories.to_numpy(dtype=object)[self.student_codes[positions]]
+        return self.frame[column].to_numpy()[positions]
+
+    def filter(self, conditions, year_labels):
+        row_positions = self.dataset.row_positions
+        positions = None
+
+        # Equality on Name narrows the candidates to one student's rows
+        for column, operator, value in conditions:
+            if column == "Name" and operator == "eq":
+                if value not in self.dataset.grades.students:
+                    return np.empty(0, dtype=np.int64)
+                student_positions = row_positions[self.dataset.grades.student_code(value)]
+                positions = student_positions[student_positions >= 0]
+                break
+        if positions is None:
+            positions = np.arange(len(self.frame))
+
+        for column, operator, value in conditions:
+            # Text "contains" ignores case either way, like the student search
+            fold = operator in CASE_INSENSITIVE or operator == "contains"
+            operator = CASE_INSENSITIVE.get(operator, operator)
+            if column == "Year":
+                codes = self._year_codes(value, year_labels, contains=operator == "contains", fold=fold)
+                if operator in ("eq", "ne", "contains"):
+                    keep = np.isin(self.year_codes[positions], codes)
+                    if operator == "ne":
+                        keep = ~keep
+                elif codes:
+                    keep = _compare(self.year_codes[positions], operator, codes[0])
+                else:
+                    return np.empty(0, dtype=np.int64)
+            elif column == "Name":
+                values = self._column("Name", positions).astype(str)
+                if fold:
+                    values, value = np.char.lower(values), value.lower()
+                if operator == "contains":
+                    keep = np.char.find(values, value) >= 0
+                else:
+                    keep = _compare(values, operator, value)
+            elif column in self.frame.columns:
+                try:
+                    number = float(value)
+                except ValueError:
+                    return np.empty(0, dtype=np.int64)
+                if operator == "contains":
+                    operator = "eq"
+                with np.errstate(invalid="ignore"):
+                    keep = _compare(self._column(column, positions), operator, number)
+            else:
+                continue
+            positions = positions[keep]
+        return positions
+
+    def sort(self, positions, sort_by):
+        keys = []
+        for item in reversed(sort_by or []):
+            column = item["column_id"]
+            descending = item.get("direction") == "desc"
+            if column == "Name":
+                key = self.student_codes[positions].astype(np.float64)
+            elif column == "Year":
+                key = self.year_codes[positions].astype(np.float64)
+            elif column in self.frame.columns:
+                key = self._column(column, positions).astype(np.float64)
+            else:
+                continue
+            if descending:
+                key = -key
+            # Missing grades sort last either way
+            keys.append(np.where(np.isnan(key), np.inf, key))
+        if not keys:
+            return positions
+        return positions[np.lexsort(keys)]
+
+    # Return (records, page_count) for one page of the table
+    def page(self, columns, page_current, page_size, sort_by, filter_query, year_labels):
+        reverse_labels = {label: year for year, label in year_labels.items()}
+        positions = self.filter(parse_filter_query(filter_query), reverse_labels)
+        positions = self.sort(positions, sort_by)
+
+        page_size = page_size or PAGE_SIZE
+        page_count = max(1, -(-len(positions) // page_size))
+        start = (page_current or 0) * page_size
+        page_positions = positions[start:start + page_size]
+
+        page_df = self.frame.iloc[page_positions][columns].copy()
+        page_df["Year"] = page_df["Year"].map(year_labels).astype(object)
+        return page_df.to_dict("records"), page_count
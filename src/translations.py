@@ -0,0 +1,77 @@
+import json
+from pathlib import Path
+
+from src.dataset import all_years, subjects
+
+# One JSON catalog per language; add a file here to add a language
+CATALOG_DIR = Path(__file__).resolve().parent / "catalogs"
+
+
+def load_catalogs(catalog_dir=CATALOG_DIR):
+    catalogs = {}
+    for path in sorted(Path(catalog_dir).glob("*.json")):
+        with open(path, encoding="utf-8") as handle:
+            catalogs[path.stem] = json.load(handle)
+    return catalogs
+
+
+# Translation dictionary, keyed by language code
+translations = load_catalogs()
+
+
+def language_options():
+    return [
+        {"label": translation["language_name"], "value": language}
+        for language, translation in translations.items()
+    ]
+
+
+def get_columns(language):
+    translation = translations[language]
+    columns = (
+        [
+            {"name": translation["student"], "id": "Name"},
+            {"name": translation["grade"], "id": "Year"},
+        ]
+        + [{"name": translation["subjects"][subject], "id": subject} for subject in subjects]
+        + [{"name": translation["average_grade"], "id": "Grade Average"}]
+    )
+    return columns
+
+
+def get_exam_columns(language, subject):
+    translation = translations[language]
+    columns = [
+        {"name": translation["student"], "id": "Name"},
+        {"name": translation["grade"], "id": "Year"},
+        {"name": translation["exam1"], "id": f"{subject} Exam 1"},
+        {"name": translation["exam2"], "id": f"{subject} Exam 2"},
+        {"name": translation["exam3"], "id": f"{subject} Exam 3"},
+    ]
+    return columns
+
+
+# Everything that changes with the language, precomputed for the browser:
+# the text of each label component, the column specs of both tables and the
+# year dropdown options, plus the raw strings for the clientside figures
+def compile_catalog(language):
+    translation = translations[language]
+    return {
+        "labels": {
+            "student-label": translation["student_selection"],
+            "dashboard-title": translation["student_performance_dashboard"],
+            "grade-label": translation["grade_selection"],
+            "subject-label": translation["subject"],
+            "average-label": translation["average_grade"],
+        },
+        "summary_columns": get_columns(language),
+        "exam_columns": {subject: get_exam_columns(language, subject) for subject in subjects},
+        "year_options": [
+            {"label": translation["grades"][year], "value": year} for year in all_years
+        ],
+        "strings": translation,
+    }
+
+
+def compile_catalogs():
+    return {language: compile_catalog(language) for language in translations}
@@ -0,0 +1,210 @@
+import logging
+import os
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import jsonify
+
+from src.callbacks import Selection, performance_figure, subject_figure
+from src.translations import translations
+
+logger = logging.getLogger(__name__)
+
+# Readiness probe for load balancers; answers 503 until the warmup is done
+READY_PATH = "/ready"
+
+
+# Warmups to reset in a forked child, held weakly for the same reason as
+# the figure caches (see src/figure_cache.py)
+_warmups = weakref.WeakSet()
+
+
+def _after_fork_in_child():
+    for instance in list(_warmups):
+        instance._after_fork()
+
+
+os.register_at_fork(after_in_child=_after_fork_in_child)
+
+
+# The students to warm, in dropdown order: the first one is the default
+# selection that every page load asks for. limit=0 means every student.
+def warmup_students(dataset, limit=0):
+    students = list(dataset.grades.students)
+    return students[:limit] if limit else students
+
+
+class Warmup:
+    """Builds every chart for the chosen students into the figure cache.
+
+    For each student, each year they have grades for and each language, the
+    subject chart and the exam chart of every subject go through the same
+    ``Selection`` path as the callbacks, so the first click after a deploy is
+    a cache hit. ``start`` runs the builds on a thread pool in the
+    background; ``run`` blocks until they are done. Progress is logged every
+    10% and reported by ``stats``. A warmup that stops on an unexpected
+    error ends in the "failed" state: the app then serves from cold caches,
+    so it counts as ready too.
+    """
+
+    def __init__(self, dataset, figure_cache, students=None, threads=4):
+        self.dataset = dataset
+        self.figure_cache = figure_cache
+        self.students = warmup_students(dataset) if students is None else list(students)
+        self.threads = threads
+        self.languages = list(translations)
+        self.state = "pending"
+        self.pid = None
+        self.total = 0
+        self.done = 0
+        self.errors = 0
+        self.started = None
+        self.finished = None
+        self.error = None
+        self._lock = threading.Lock()
+        self._thread = None
+        _warmups.add(self)
+
+    # The lock may have been held by a warmup thread at fork time
+    def _after_fork(self):
+        self._lock = threading.Lock()
+
+    # (student, year) pairs the dataset has a row for
+    def _views(self):
+        grades = self.dataset.grades
+        row_positions = self.dataset.row_positions
+        for student in self.students:
+            student_code = grades.student_code(student)
+            for year_code, year in enumerate(grades.years):
+                if row_positions[student_code, year_code] >= 0:
+                    yield student, year
+
+    def _warm(self, student, year):
+        for language in self.languages:
+            selection = Selection(self.dataset, language, student, year, figure_cache=self.figure_cache)
+            builds = [lambda: subject_figure(selection)]
+            for subject in self.dataset.grades.subjects:
+                subject_selection = Selection(
+                    self.dataset, language, student, year, subject, self.figure_cache
+                )
+                builds.append(lambda s=subject_selection: performance_figure(s))
+            for build in builds:
+                try:
+                    build()
+                except Exception:
+                    logger.exception("Warmup failed for %s / %s / %s", student, year, language)
+                    with self._lock:
+                        self.errors += 1
+                self._advance()
+
+    def _advance(self):
+        with self._lock:
+            self.done += 1
+            step = max(1, self.total // 10)
+            if self.done % step == 0 or self.done == self.total:
+                logger.info("Warmup %d/%d figures (%.0f%%)", self.done, self.total, 100 * self.done / self.total)
+
+    def run(self):
+        state = "failed"
+        try:
+            self._run()
+            state = "ready"
+        except Exception as error:
+            logger.exception("Warmup stopped after %d/%d figures", self.done, self.total)
+            self.error = repr(error)
+        finally:
+            # Always leave a final state, or /ready would answer 503 for good
+            with self._lock:
+                self.state = state
+                self.finished = time.time()
+        if state == "ready":
+            logger.info("Warmup finished in %.1fs", self.finished - self.started)
+
+    def _run(self):
+        with self._lock:
+            self.state = "running"
+            self.pid = os.getpid()
+            self.started = time.time()
+            self.error = None
+        views = list(self._views())
+        figures_per_view = len(self.languages) * (1 + len(self.dataset.grades.subjects))
+        with self._lock:
+            self.total = len(views) * figures_per_view
+            self.done = 0
+            self.errors = 0
+        if self.figure_cache.shared is None and self.total > self.figure_cache.max_entries:
+            logger.warning(
+                "Warmup builds %d figures but the figure cache holds %d; the first ones will be evicted",
+                self.total, self.figure_cache.max_entries,
+            )
+        logger.info("Warming %d figures for %d students", self.total, len(self.students))
+
+        with ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix="warmup") as pool:
+            for future in [pool.submit(self._warm, student, year) for student, year in views]:
+                future.result()
+
+    def start(self):
+        # Build one chart of each kind first, in the calling thread: plotly
+        # imports parts of itself on first use, and a gunicorn fork while a
+        # warmup thread is halfway through such an import would leave the
+        # worker with a broken module
+        for student, year in self._views():
+            selection = Selection(
+                self.dataset, self.languages[0], student, year, self.dataset.grades.subjects[0], self.figure_cache
+            )
+            subject_figure(selection)
+            performance_figure(selection)
+            break
+        # Claimed before the thread runs so a fork right after start() is
+        # recognised by ensure_running in the child
+        with self._lock:
+            self.state = "running"
+            self.pid = os.getpid()
+        self._thread = threading.Thread(target=self.run, name="warmup", daemon=True)
+        self._thread.start()
+
+    # A background warmup started in the gunicorn master does not survive
+    # the fork into the workers, so each worker that finds it unfinished
+    # starts its own (served largely from the shared cache, if there is one)
+    def ensure_running(self):
+        if self.pid is not None and self.pid != os.getpid() and not self.ready:
+            with self._lock:
+                if self.pid == os.getpid():
+                    return
+                self.pid = os.getpid()
+            self.start()
+
+    @property
+    def ready(self):
+        return self.state in ("ready", "failed")
+
+    def stats(self):
+        with self._lock:
+            end = self.finished or time.time()
+            return {
+                "state": self.state,
+                "done": self.done,
+                "total": self.total,
+                "errors": self.errors,
+                "error": self.error,
+                "students": len(self.students),
+                "seconds": round(end - self.started, 3) if self.started else None,
+            }
+
+
+def init_app(server, warmup=None):
+    if warmup is not None:
+        @server.before_request
+        def resume_warmup():
+            warmup.ensure_running()
+
+    # 200 once the warmup has finished (or failed, leaving the caches cold),
+    # 503 before that
+    @server.route(READY_PATH)
+    def ready():
+        if warmup is None:
+            return jsonify(state="ready")
+        warmup.ensure_running()
+        return jsonify(warmup.stats()), 200 if warmup.ready else 503
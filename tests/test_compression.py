@@ -0,0 +1,44 @@
+import json
+import os
+import shutil
+
+from src import compression
+
+SCRIPT = b"console.log('precompressed');\n" * 200
+
+
+def precompress_assets(tmp_path, monkeypatch):
+    assets = tmp_path / "build" / "assets"
+    assets.mkdir(parents=True)
+    (assets / "app.js").write_bytes(SCRIPT)
+    monkeypatch.setattr(compression, "ASSETS_DIR", assets)
+    monkeypatch.setattr(compression, "static_sources", lambda min_bytes: {"/assets/app.js": (None, "app.js")})
+    compression.precompress(tmp_path / "static")
+    return assets
+
+
+def test_manifest_survives_moving_the_app(tmp_path, monkeypatch):
+    assets = precompress_assets(tmp_path, monkeypatch)
+    manifest = json.loads((tmp_path / "static" / "manifest.json").read_text())
+    assert str(tmp_path) not in json.dumps(manifest)
+
+    # The slug is built in one directory and run from another, with new mtimes
+    moved = tmp_path / "app" / "assets"
+    shutil.copytree(assets, moved)
+    shutil.rmtree(assets)
+    os.utime(moved / "app.js", (0, 0))
+    monkeypatch.setattr(compression, "ASSETS_DIR", moved)
+    assert set(compression.PrecompressedFiles(tmp_path / "static").files) == {"/assets/app.js"}
+
+
+def test_changed_sources_are_ignored(tmp_path, monkeypatch):
+    assets = precompress_assets(tmp_path, monkeypatch)
+    (assets / "app.js").write_bytes(SCRIPT.replace(b"precompressed", b"edited-file!!"))
+    assert compression.PrecompressedFiles(tmp_path / "static").files == {}
+
+
+def test_old_manifest_entries_are_ignored(tmp_path):
+    (tmp_path / "manifest.json").write_text(json.dumps({
+        "/assets/app.js": {"source": "/tmp/build/src/assets/app.js", "size": 1, "mtime_ns": 1, "encodings": ["gzip"]},
+    }))
+    assert compression.PrecompressedFiles(tmp_path).files == {}
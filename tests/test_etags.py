@@ -0,0 +1,110 @@
+import pandas as pd
+import pytest
+
+from src import images
+from src.app import create_app
+from src.config import Config
+from src.data_source import FrameDataSource
+from src.dataset import subjects
+
+CREDENTIALS = ("teacher", "secret")
+
+
+@pytest.fixture(scope="module")
+def frame():
+    df = pd.DataFrame({
+        "Name": ["Ana Lopez", "Ana Lopez"],
+        "Image URL": ["ana.jpg"] * 2,
+        "Year": ["K", "3rd"],
+    })
+    for subject in subjects:
+        for n in (1, 2, 3):
+            df[f"{subject} Exam {n}"] = [10, 12]
+    return df
+
+
+@pytest.fixture
+def make_server(frame, tmp_path, monkeypatch):
+    # No background resizing: the tests set the store's photos themselves
+    monkeypatch.setattr(images.ImageStore, "start", lambda self, threads=4: None)
+
+    def make(**settings):
+        config = Config(secret_key="test", image_dir=str(tmp_path / "images"), warmup=False, **settings)
+        return create_app(config, FrameDataSource(frame, version="v1")).server
+
+    return make
+
+
+def dashboard_request(server):
+    dependencies = server.test_client().get("/_dash-dependencies").get_json()
+    callback = next(item for item in dependencies if "summary-table.data" in item["output"])
+    values = {"language-dropdown": "en", "student-dropdown": "Ana Lopez", "year-dropdown": "3rd", "subject-dropdown": subjects[0]}
+    return {
+        "output": callback["output"],
+        "outputs": [
+            {"id": output.split(".")[0], "property": output.split(".")[1]}
+            for output in callback["output"].strip(".").split("...")
+        ],
+        "inputs": [dict(item, value=values[item["id"]]) for item in callback["inputs"]],
+        "state": [],
+        "changedPropIds": ["student-dropdown.value"],
+    }
+
+
+def test_index_and_callback_get_weak_etags(make_server):
+    server = make_server()
+    client = server.test_client()
+    body = dashboard_request(server)
+    for response in (client.get("/"), client.get("/_dash-layout"), client.post("/_dash-update-component", json=body)):
+        assert response.status_code == 200
+        etag, weak = response.get_etag()
+        assert etag and weak
+
+
+def test_matching_if_none_match_gets_304(make_server):
+    server = make_server()
+    client = server.test_client()
+    index = client.get("/")
+    assert index.cache_control.no_cache
+    response = client.get("/", headers={"If-None-Match": index.headers["ETag"]})
+    assert response.status_code == 304
+    assert response.headers["ETag"] == index.headers["ETag"]
+
+    body = dashboard_request(server)
+    update = client.post("/_dash-update-component", json=body)
+    response = client.post("/_dash-update-component", json=body, headers={"If-None-Match": update.headers["ETag"]})
+    assert (response.status_code, response.data) == (304, b"")
+    # Other input values are a different response
+    body["inputs"][2]["value"] = "K"
+    response = client.post("/_dash-update-component", json=body, headers={"If-None-Match": update.headers["ETag"]})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != update.headers["ETag"]
+
+
+def test_tags_change_with_the_image_store(make_server):
+    server = make_server()
+    client = server.test_client()
+    body = dashboard_request(server)
+    layout = client.get("/_dash-layout").headers["ETag"]
+    update = client.post("/_dash-update-component", json=body).headers["ETag"]
+
+    server.extensions["images"]._set_digests({"ana.jpg": "0123456789abcdef"})
+    response = client.get("/_dash-layout", headers={"If-None-Match": layout})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != layout
+    response = client.post("/_dash-update-component", json=body, headers={"If-None-Match": update})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != update
+
+
+def test_auth_is_checked_before_304(make_server):
+    server = make_server(auth_username=CREDENTIALS[0], auth_password=CREDENTIALS[1])
+    client = server.test_client()
+    index = client.get("/", auth=CREDENTIALS)
+    layout = client.get("/_dash-layout", auth=CREDENTIALS)
+    assert index.status_code == layout.status_code == 200
+
+    assert client.get("/", headers={"If-None-Match": index.headers["ETag"]}).status_code == 401
+    assert client.get("/_dash-layout", headers={"If-None-Match": layout.headers["ETag"]}).status_code in (401, 403)
+    response = client.get("/", headers={"If-None-Match": index.headers["ETag"]}, auth=CREDENTIALS)
+    assert response.status_code == 304
@@ -0,0 +1,94 @@
+import gc
+import weakref
+
+import pytest
+
+from src.figure_cache import FigureCache
+from src.shared_cache import open_shared_cache
+
+
+def figure(title):
+    return {"data": [], "layout": {"title": {"text": title}}}
+
+
+def sized(size):
+    return {"size": size}
+
+
+def make_cache(**kwargs):
+    return FigureCache(encode=False, sizeof=lambda entry: entry["size"], **kwargs)
+
+
+def build_counter():
+    builds = []
+
+    def build(value):
+        def run():
+            builds.append(value)
+            return value
+        return run
+
+    return builds, build
+
+
+def test_evicts_least_recently_used_entry():
+    cache = make_cache(max_entries=2, max_bytes=100)
+    builds, build = build_counter()
+    cache.get_or_build("v1", "a", build(sized(1)))
+    cache.get_or_build("v1", "b", build(sized(1)))
+    cache.get_or_build("v1", "a", build(sized(1)))  # a is now the most recent
+    cache.get_or_build("v1", "c", build(sized(1)))
+    assert list(cache._entries) == ["a", "c"]
+    cache.get_or_build("v1", "b", build(sized(1)))
+    assert len(builds) == 4
+    assert cache.stats()["evictions"] == 2
+    assert cache.stats()["hits"] == 1
+
+
+def test_byte_limit():
+    cache = make_cache(max_entries=10, max_bytes=10)
+    for key in "abc":
+        cache.get_or_build("v1", key, lambda: sized(4))
+    assert list(cache._entries) == ["b", "c"]
+    assert cache.stats()["bytes"] == 8
+    # A figure larger than the whole budget is returned but not kept
+    assert cache.get_or_build("v1", "huge", lambda: sized(11)) == sized(11)
+    assert "huge" not in cache._entries
+    assert cache.stats()["bytes"] == 8
+
+
+def test_new_dataset_version_empties_the_cache():
+    cache = make_cache()
+    cache.get_or_build("v1", "a", lambda: sized(1))
+    assert cache.get_or_build("v2", "a", lambda: sized(2)) == sized(2)
+    assert len(cache) == 1
+    assert cache.stats()["misses"] == 2
+
+
+@pytest.mark.parametrize("backend", ["filesystem", "sqlite"])
+def test_shared_entries_follow_the_code_version(tmp_path, backend):
+    path = tmp_path / backend
+    builds, build = build_counter()
+
+    def shared_cache(code_version):
+        return FigureCache(shared=open_shared_cache(backend, path), code_version=code_version)
+
+    old = shared_cache("old")
+    old.get_or_build("v1", ("John Doe", "3rd"), build(figure("old")))
+    other_worker = shared_cache("old")
+    assert other_worker.get_or_build("v1", ("John Doe", "3rd"), build(figure("old"))).to_plotly_json() == figure("old")
+    assert other_worker.stats()["shared_hits"] == 1
+    # Workers running new code never read the old code's figures
+    new = shared_cache("new")
+    assert new.get_or_build("v1", ("John Doe", "3rd"), build(figure("new"))).to_plotly_json() == figure("new")
+    assert new.stats()["shared_hits"] == 0
+    assert len(builds) == 2
+
+
+def test_dropped_caches_are_freed():
+    cache = make_cache()
+    cache.get_or_build("v1", "a", lambda: sized(1))
+    ref = weakref.ref(cache)
+    del cache
+    gc.collect()
+    assert ref() is None
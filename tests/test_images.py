@@ -0,0 +1,45 @@
+import io
+
+from PIL import Image
+
+from src import images
+
+REPO_URL = "https://github.com/hcoco1/dashcoco1/raw/53ac6b1de9b01e57a61e707a713e1ad84a67115a/data/photo.jpg"
+
+
+def jpeg(color):
+    buffer = io.BytesIO()
+    Image.new("RGB", (40, 40), color).save(buffer, "JPEG")
+    return buffer.getvalue()
+
+
+class FakeResponse:
+    def __init__(self, content):
+        self.content = content
+
+    def raise_for_status(self):
+        pass
+
+
+def test_only_repo_urls_read_the_checkout(tmp_path, monkeypatch):
+    local_dir = tmp_path / "data"
+    local_dir.mkdir()
+    (local_dir / "photo.jpg").write_bytes(jpeg("red"))
+    downloads = {
+        "https://example.com/a/photo.jpg": jpeg("green"),
+        "https://example.com/b/photo.jpg": jpeg("blue"),
+    }
+    requested = []
+
+    def fake_get(url, timeout):
+        requested.append(url)
+        return FakeResponse(downloads[url])
+
+    monkeypatch.setattr(images.requests, "get", fake_get)
+    store = images.ImageStore(tmp_path / "images", widths=(16,), local_dir=local_dir)
+    store.ingest([REPO_URL, *downloads])
+
+    assert sorted(requested) == sorted(downloads)
+    digests = [store.digests[url] for url in (REPO_URL, *downloads)]
+    assert len(set(digests)) == 3
+    assert store.src(REPO_URL).startswith(f"{images.IMAGE_PATH}/{digests[0]}-")
@@ -0,0 +1,73 @@
+import os
+import time
+
+import pytest
+
+from src import shared_cache
+from src.shared_cache import FileSystemCache, SQLiteCache, cache_key
+
+
+@pytest.fixture(params=["filesystem", "sqlite"])
+def make_cache(request, tmp_path):
+    def make(**kwargs):
+        if request.param == "filesystem":
+            return FileSystemCache(tmp_path / "figures", prune_interval=1, **kwargs)
+        return SQLiteCache(tmp_path / "figures.sqlite", **kwargs)
+
+    return make
+
+
+# Make ``key`` look ``age`` seconds old
+def age_entry(cache, key, age):
+    if isinstance(cache, FileSystemCache):
+        then = time.time() - age
+        os.utime(cache._path(key), (then, then))
+    else:
+        cache._connect().execute("UPDATE entries SET created = created - ? WHERE key = ?", (age, key))
+
+
+def test_round_trip(make_cache):
+    cache = make_cache()
+    key = cache_key("code", "v1", "John Doe", "3rd")
+    assert cache.get(key) is None
+    cache.set(key, b"figure")
+    assert cache.get(key) == b"figure"
+    assert (cache.stats()["hits"], cache.stats()["misses"]) == (1, 1)
+
+
+def test_expired_entries_are_misses_and_pruned(make_cache):
+    cache = make_cache(ttl=60)
+    old, fresh = cache_key("old"), cache_key("fresh")
+    cache.set(old, b"old")
+    cache.set(fresh, b"fresh")
+    age_entry(cache, old, 120)
+    assert cache.get(old) is None
+    assert cache.get(fresh) == b"fresh"
+    cache.prune()
+    assert cache.stats()["entries"] == 1
+
+
+def test_oldest_entries_go_first_over_max_bytes(make_cache):
+    cache = make_cache(max_bytes=10)
+    keys = [cache_key(i) for i in range(3)]
+    for age, key in zip((30, 20, 10), keys):
+        cache.set(key, b"1234")
+        age_entry(cache, key, age)
+    cache.prune()
+    assert [cache.get(key) for key in keys] == [None, b"1234", b"1234"]
+    assert cache.stats()["bytes"] == 8
+    # A value larger than the whole budget is not stored
+    cache.set(cache_key("huge"), b"x" * 11)
+    assert cache.get(cache_key("huge")) is None
+
+
+def test_keys_differ_by_every_part():
+    assert cache_key("a", "v1", "x") != cache_key("b", "v1", "x")
+    assert cache_key("a", "v1", "x") == cache_key("a", "v1", "x")
+
+
+def test_open_shared_cache(tmp_path):
+    assert shared_cache.open_shared_cache(None) is None
+    assert isinstance(shared_cache.open_shared_cache("sqlite", tmp_path / "c.sqlite"), SQLiteCache)
+    with pytest.raises(ValueError):
+        shared_cache.open_shared_cache("redis")
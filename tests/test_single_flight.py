@@ -0,0 +1,85 @@
+import gc
+import threading
+import time
+import weakref
+
+import pytest
+
+from src.single_flight import SingleFlight
+
+CALLERS = 8
+
+
+# Run ``func`` through ``flight`` from CALLERS threads at once; the first
+# caller's function blocks until every other caller is waiting on it
+def run_concurrently(flight, func):
+    release = threading.Event()
+    calls = []
+
+    def blocking_func():
+        calls.append(threading.get_ident())
+        release.wait(5)
+        return func()
+
+    outcomes = [None] * CALLERS
+
+    def caller(i):
+        try:
+            outcomes[i] = ("result", flight.do("key", blocking_func))
+        except Exception as error:
+            outcomes[i] = ("error", error)
+
+    threads = [threading.Thread(target=caller, args=(i,)) for i in range(CALLERS)]
+    for thread in threads:
+        thread.start()
+    for _ in range(500):
+        if flight.stats()["coalesced"] == CALLERS - 1:
+            break
+        time.sleep(0.01)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    return calls, outcomes
+
+
+def test_concurrent_callers_share_one_call():
+    flight = SingleFlight()
+    result = object()
+    calls, outcomes = run_concurrently(flight, lambda: result)
+    assert len(calls) == 1
+    assert outcomes == [("result", result)] * CALLERS
+    assert flight.stats() == {"calls": 1, "coalesced": CALLERS - 1, "in_flight": 0}
+
+
+def test_leader_error_reaches_every_waiter():
+    flight = SingleFlight()
+    leader_error = ValueError("bad figure")
+
+    def fail():
+        raise leader_error
+
+    calls, outcomes = run_concurrently(flight, fail)
+    assert len(calls) == 1
+    errors = [error for kind, error in outcomes if kind == "error"]
+    assert len(errors) == CALLERS
+    assert all(isinstance(error, ValueError) and error.args == ("bad figure",) for error in errors)
+    # Waiters raise their own copy, chained to the leader's exception
+    waiter_errors = [error for error in errors if error is not leader_error]
+    assert len(waiter_errors) == CALLERS - 1
+    assert all(error.__cause__ is leader_error for error in waiter_errors)
+    assert len({id(error) for error in waiter_errors}) == CALLERS - 1
+
+
+def test_calls_after_the_first_run_again():
+    flight = SingleFlight()
+    assert flight.do("key", lambda: 1) == 1
+    assert flight.do("key", lambda: 2) == 2
+    with pytest.raises(KeyError):
+        flight.do("key", lambda: {}["missing"])
+    assert flight.stats() == {"calls": 3, "coalesced": 0, "in_flight": 0}
+
+
+def test_dropped_instances_are_freed():
+    ref = weakref.ref(SingleFlight())
+    gc.collect()
+    assert ref() is None
@@ -0,0 +1,107 @@
+import pandas as pd
+import pytest
+
+from src.dataset import Dataset, subjects
+from src.table_query import TableQuery, parse_filter_query
+from src.translations import translations
+
+
+@pytest.fixture(scope="module")
+def dataset():
+    df = pd.DataFrame({
+        "Name": ["Ana Lopez", "Ana Lopez", "Ana Lopez", "Luis Perez", "Luis Perez"],
+        "Image URL": ["ana.jpg"] * 3 + ["luis.jpg"] * 2,
+        "Year": ["K", "3rd", "10th", "3rd", "12th"],
+    })
+    for subject in subjects:
+        for n in (1, 2, 3):
+            df[f"{subject} Exam {n}"] = [10, 12, 14, 16, 18]
+    return Dataset.from_frame(df, version="test")
+
+
+def filtered_years(dataset, filter_query, language="en"):
+    labels = translations[language]["grades"]
+    reverse_labels = {label: year for year, label in labels.items()}
+    query = dataset.summary_query
+    positions = query.filter(parse_filter_query(filter_query), reverse_labels)
+    frame = dataset.summary_df.iloc[positions]
+    return sorted(zip(frame["Name"].astype(str), frame["Year"].astype(str)))
+
+
+def test_parse_filter_query():
+    assert parse_filter_query('{Name} s= "Ana Lopez" && {Art} >= 12 && {Year} icontains kinder') == [
+        ("Name", "eq", "Ana Lopez"),
+        ("Art", "ge", "12"),
+        ("Year", "icontains", "kinder"),
+    ]
+
+
+def test_parse_filter_query_skips_unknown_parts():
+    assert parse_filter_query("{Art} ~ 3 && nonsense && {Art} i!= 4") == [("Art", "ine", "4")]
+    assert parse_filter_query(None) == []
+
+
+def test_year_contains_matches_only_that_year(dataset):
+    assert filtered_years(dataset, "{Year} contains 3rd") == [("Ana Lopez", "3rd"), ("Luis Perez", "3rd")]
+    assert filtered_years(dataset, "{Year} contains 3") == [("Ana Lopez", "3rd"), ("Luis Perez", "3rd")]
+    assert filtered_years(dataset, "{Year} contains 3ro", language="es") == [("Ana Lopez", "3rd"), ("Luis Perez", "3rd")]
+
+
+def test_year_case_insensitive_operators(dataset):
+    assert filtered_years(dataset, "{Year} icontains KINDER") == [("Ana Lopez", "K"), ("Luis Perez", "K")]
+    assert filtered_years(dataset, "{Year} i= kindergarten") == [("Ana Lopez", "K"), ("Luis Perez", "K")]
+    assert filtered_years(dataset, "{Year} s= kindergarten") == []
+    assert len(filtered_years(dataset, "{Year} i!= KINDERGARTEN")) == 24
+
+
+def test_year_translated_and_ordered(dataset):
+    assert filtered_years(dataset, "{Year} = Kinder && {Name} = Ana Lopez", language="es") == [("Ana Lopez", "K")]
+    assert filtered_years(dataset, "{Year} > 10th && {Name} = Ana Lopez") == [("Ana Lopez", "11th"), ("Ana Lopez", "12th")]
+    assert filtered_years(dataset, "{Year} <= 1ro && {Name} = Luis Perez", language="es") == [
+        ("Luis Perez", "1st"), ("Luis Perez", "K"),
+    ]
+    assert filtered_years(dataset, "{Year} > 13th") == []
+    assert len(filtered_years(dataset, "{Year} != 3rd")) == 24
+
+
+def test_name_and_grade_filters(dataset):
+    assert filtered_years(dataset, "{Name} = Luis Perez && {Art} >= 16") == [("Luis Perez", "12th"), ("Luis Perez", "3rd")]
+    assert filtered_years(dataset, "{Name} i= luis perez && {Year} = 3rd") == [("Luis Perez", "3rd")]
+    assert filtered_years(dataset, "{Name} s= luis perez") == []
+    assert filtered_years(dataset, "{Name} contains LOPEZ && {Grade Average} < 13") == [
+        ("Ana Lopez", "3rd"), ("Ana Lopez", "K"),
+    ]
+    assert filtered_years(dataset, "{Name} = Nobody") == []
+    assert filtered_years(dataset, "{Art} > high") == []
+
+
+def test_sort(dataset):
+    query = dataset.summary_query
+    positions = query.filter([], {})
+    by_grade = query.sort(positions, [{"column_id": "Art", "direction": "desc"}])
+    ordered = dataset.summary_df.iloc[by_grade]
+    assert list(ordered["Art"][:5]) == [18, 16, 14, 12, 10]
+    # Missing grades sort last in either direction
+    assert ordered["Art"][5:].isna().all()
+    by_name = query.sort(positions, [{"column_id": "Name", "direction": "desc"}, {"column_id": "Year", "direction": "asc"}])
+    ordered = dataset.summary_df.iloc[by_name]
+    assert list(ordered["Name"].astype(str)[:2]) == ["Luis Perez", "Luis Perez"]
+    assert list(ordered["Year"].astype(str)[:2]) == ["K", "1st"]
+
+
+def test_page(dataset):
+    query = dataset.summary_query
+    labels = translations["es"]["grades"]
+    records, page_count = query.page(["Name", "Year"], 1, 10, [{"column_id": "Year", "direction": "desc"}], "", labels)
+    assert page_count == 3
+    assert [record["Year"] for record in records] == ["7mo", "7mo", "6to", "6to", "5to", "5to", "4to", "4to", "3ro", "3ro"]
+    records, page_count = query.page(["Name", "Year"], 0, None, None, "{Year} contains kinder && {Name} contains ana", labels)
+    assert (records, page_count) == ([{"Name": "Ana Lopez", "Year": "Kinder"}], 1)
+    records, page_count = query.page(["Name", "Year"], 0, 10, None, "{Name} = Nobody", labels)
+    assert (records, page_count) == ([], 1)
+
+
+def test_exam_table(dataset):
+    assert isinstance(dataset.exam_query, TableQuery)
+    positions = dataset.exam_query.filter(parse_filter_query("{Art Exam 2} = 14"), {})
+    assert list(dataset.df["Year"].astype(str).iloc[positions]) == ["10th"]
@@ -0,0 +1,45 @@
+import pandas as pd
+from flask import Flask
+
+from src import warmup
+from src.data_source import DEFAULT_CSV_PATH
+from src.dataset import Dataset
+from src.figure_cache import FigureCache
+
+
+class BrokenDataset:
+    """A dataset whose grades cannot be read."""
+
+    @property
+    def grades(self):
+        raise RuntimeError("no grades")
+
+
+def ready_response(startup_warmup):
+    server = Flask(__name__)
+    warmup.init_app(server, startup_warmup)
+    response = server.test_client().get(warmup.READY_PATH)
+    return response.status_code, response.get_json()
+
+
+def test_ready_after_warmup():
+    dataset = Dataset.from_frame(pd.read_csv(DEFAULT_CSV_PATH))
+    startup_warmup = warmup.Warmup(dataset, FigureCache(), warmup.warmup_students(dataset, 1), threads=2)
+    # One year in one language keeps the test fast
+    startup_warmup.languages = ["en"]
+    startup_warmup._views = lambda: iter([(startup_warmup.students[0], "3rd")])
+    assert ready_response(startup_warmup)[0] == 503
+    startup_warmup.run()
+    status, stats = ready_response(startup_warmup)
+    assert status == 200
+    assert stats["state"] == "ready"
+    assert stats["done"] == stats["total"] > 0
+
+
+def test_failed_warmup_is_final():
+    startup_warmup = warmup.Warmup(BrokenDataset(), FigureCache(), students=["John Doe"])
+    startup_warmup.run()
+    status, stats = ready_response(startup_warmup)
+    assert status == 200
+    assert stats["state"] == "failed"
+    assert "no grades" in stats["error"]